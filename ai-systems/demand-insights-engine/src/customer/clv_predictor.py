@@ -6,41 +6,83 @@ Predicts customer lifetime value using machine learning models.
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
-from sklearn.ensemble import RandomForestRegressor
+from typing import Dict, List, Optional, Union
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import vectorize
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.warning("Numba not available. Simple CLV will use plain NumPy.")
+
+
+def _clv_simple_py(aov, freq, lifespan, margin):
+    return aov * freq * lifespan * margin
+
+
+if NUMBA_AVAILABLE:
+    # Eagerly compiled ufunc: broadcasts over arrays and runs across cores
+    _clv_simple = vectorize(
+        ['float64(float64, float64, float64, float64)',
+         'float32(float32, float32, float32, float32)'],
+        target='parallel'
+    )(_clv_simple_py)
+else:
+    _clv_simple = _clv_simple_py
+
 
 class CLVPredictor:
     """
-    Predicts customer lifetime value using Random Forest regression.
+    Predicts customer lifetime value using histogram-based gradient boosting.
     
     Calculates CLV based on customer behavior, purchase history,
     and engagement metrics.
     """
     
-    def __init__(self, n_estimators: int = 100, random_state: int = 42):
-        self.model = RandomForestRegressor(
-            n_estimators=n_estimators,
-            max_depth=10,
-            min_samples_split=5,
-            random_state=random_state,
-            n_jobs=-1
+    def __init__(
+        self,
+        max_iter: int = 200,
+        random_state: int = 42,
+        n_estimators: Optional[int] = None
+    ):
+        # n_estimators is the pre-gradient-boosting name for the number of
+        # trees; keep accepting it so existing callers do not break
+        if n_estimators is not None:
+            max_iter = n_estimators
+        
+        # Features are binned once into uint8 histograms, so no scaling is needed
+        self.model = HistGradientBoostingRegressor(
+            max_iter=max_iter,
+            max_depth=8,
+            learning_rate=0.05,
+            early_stopping=True,
+            random_state=random_state
         )
-        self.scaler = StandardScaler()
+        self.random_state = random_state
         self.feature_names = []
         self.is_trained = False
+        self._high_value_threshold = None
+        self._eval_split = None
+        self._feature_importance = None
     
-    def prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
+    def prepare_features(
+        self,
+        data: pd.DataFrame,
+        high_value_threshold: Optional[float] = None
+    ) -> pd.DataFrame:
         """
         Prepare features for CLV prediction.
         
         Args:
             data: DataFrame with customer data
+            high_value_threshold: Monetary cut-off for the is_high_value flag.
+                Defaults to the 75th percentile of ``data['monetary_total']``.
             
         Returns:
             DataFrame with engineered features
@@ -76,7 +118,9 @@ class CLVPredictor:
         # Derived features
         features['is_active'] = (features['recency_days'] <= 90).astype(int)
         features['is_frequent_buyer'] = (features['frequency'] >= 5).astype(int)
-        features['is_high_value'] = (features['monetary_total'] >= features['monetary_total'].quantile(0.75)).astype(int)
+        if high_value_threshold is None:
+            high_value_threshold = float(np.quantile(features['monetary_total'], 0.75))
+        features['is_high_value'] = (features['monetary_total'] >= high_value_threshold).astype(int)
         
         return features
     
@@ -84,7 +128,8 @@ class CLVPredictor:
         self,
         data: pd.DataFrame,
         target_column: str = 'actual_clv',
-        test_size: float = 0.2
+        test_size: float = 0.2,
+        compute_importance: bool = False
     ) -> Dict:
         """
         Train the CLV prediction model.
@@ -93,13 +138,19 @@ class CLVPredictor:
             data: Training data with customer features and actual CLV
             target_column: Name of the target column
             test_size: Proportion of data for testing
+            compute_importance: If True, include permutation feature
+                importance in the result (see get_feature_importance)
             
         Returns:
             Dictionary with training metrics
         """
         try:
+            # Fix the high-value cut-off at training time so scoring does not
+            # depend on the composition of each prediction batch
+            self._high_value_threshold = float(np.quantile(data['monetary_total'], 0.75))
+            
             # Prepare features
-            X = self.prepare_features(data)
+            X = self.prepare_features(data, high_value_threshold=self._high_value_threshold)
             y = data[target_column]
             
             self.feature_names = X.columns.tolist()
@@ -109,32 +160,26 @@ class CLVPredictor:
                 X, y, test_size=test_size, random_state=42
             )
             
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
             # Train model
             logger.info("Training CLV prediction model...")
-            self.model.fit(X_train_scaled, y_train)
+            self.model.fit(X_train, y_train)
             
             # Evaluate
-            train_score = self.model.score(X_train_scaled, y_train)
-            test_score = self.model.score(X_test_scaled, y_test)
+            train_score = self.model.score(X_train, y_train)
+            test_score = self.model.score(X_test, y_test)
             
             # Predictions
-            y_pred = self.model.predict(X_test_scaled)
+            y_pred = self.model.predict(X_test)
             
             # Calculate metrics
             mae = np.mean(np.abs(y_test - y_pred))
             rmse = np.sqrt(np.mean((y_test - y_pred) ** 2))
             mape = np.mean(np.abs((y_test - y_pred) / y_test.replace(0, 1))) * 100
             
-            # Feature importance
-            feature_importance = pd.DataFrame({
-                'feature': self.feature_names,
-                'importance': self.model.feature_importances_
-            }).sort_values('importance', ascending=False)
-            
+            # Keep the held-out split; permutation importance re-scores the
+            # model many times, so it is only computed when asked for
+            self._eval_split = (X_test, y_test)
+            self._feature_importance = None
             self.is_trained = True
             
             result = {
@@ -144,9 +189,10 @@ class CLVPredictor:
                 'rmse': float(rmse),
                 'mape': float(mape),
                 'n_samples': len(data),
-                'n_features': len(self.feature_names),
-                'feature_importance': feature_importance.head(10).to_dict('records')
+                'n_features': len(self.feature_names)
             }
+            if compute_importance:
+                result['feature_importance'] = self.get_feature_importance().to_dict('records')
             
             logger.info(f"CLV model trained - Test R²: {test_score:.3f}, MAE: ${mae:.2f}")
             
@@ -156,12 +202,43 @@ class CLVPredictor:
             logger.error(f"Error training CLV model: {str(e)}")
             raise
     
-    def predict(self, data: pd.DataFrame) -> pd.DataFrame:
+    def get_feature_importance(self, top_n: int = 10) -> pd.DataFrame:
+        """
+        Get permutation feature importance on the held-out split.
+        
+        Gradient boosting has no impurity-based importances, so they are
+        measured by permutation on first use and cached until retraining.
+        
+        Args:
+            top_n: Number of top features to return
+            
+        Returns:
+            DataFrame with feature importance
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before computing feature importance")
+        
+        if self._feature_importance is None:
+            X_test, y_test = self._eval_split
+            importances = permutation_importance(
+                self.model, X_test, y_test, n_repeats=5, random_state=self.random_state
+            )
+            self._feature_importance = pd.DataFrame({
+                'feature': self.feature_names,
+                'importance': importances.importances_mean
+            }).sort_values('importance', ascending=False)
+        
+        return self._feature_importance.head(top_n)
+    
+    def predict(self, data: pd.DataFrame, copy_input: bool = True) -> pd.DataFrame:
         """
         Predict CLV for customers.
         
         Args:
             data: DataFrame with customer features
+            copy_input: If True, return a copy of ``data`` with the prediction
+                columns appended; if False, return only ``customer_id`` and
+                the prediction columns
             
         Returns:
             DataFrame with CLV predictions
@@ -171,7 +248,7 @@ class CLVPredictor:
                 raise ValueError("Model must be trained before prediction")
             
             # Prepare features
-            X = self.prepare_features(data)
+            X = self.prepare_features(data, high_value_threshold=self._high_value_threshold)
             
             # Ensure all features are present
             for feature in self.feature_names:
@@ -180,12 +257,14 @@ class CLVPredictor:
             
             X = X[self.feature_names]
             
-            # Scale and predict
-            X_scaled = self.scaler.transform(X)
-            predictions = self.model.predict(X_scaled)
+            # Predict
+            predictions = self.model.predict(X)
             
             # Create result DataFrame
-            result = data.copy()
+            if copy_input:
+                result = data.copy()
+            else:
+                result = data[['customer_id']].copy()
             result['predicted_clv'] = predictions
             result['clv_segment'] = pd.cut(
                 predictions,
@@ -203,16 +282,19 @@ class CLVPredictor:
     
     def calculate_clv_simple(
         self,
-        avg_order_value: float,
-        purchase_frequency: float,
-        customer_lifespan_years: float,
-        profit_margin: float = 0.2
-    ) -> float:
+        avg_order_value: Union[float, np.ndarray],
+        purchase_frequency: Union[float, np.ndarray],
+        customer_lifespan_years: Union[float, np.ndarray],
+        profit_margin: Union[float, np.ndarray] = 0.2
+    ) -> Union[float, np.ndarray]:
         """
         Calculate CLV using simple formula.
         
         CLV = (Average Order Value × Purchase Frequency × Customer Lifespan) × Profit Margin
         
+        Accepts scalars or arrays; array arguments are broadcast together so
+        a whole customer base can be scored in one call.
+        
         Args:
             avg_order_value: Average value per order
             purchase_frequency: Number of purchases per year
@@ -220,10 +302,17 @@ class CLVPredictor:
             profit_margin: Profit margin as decimal (default 20%)
             
         Returns:
-            Calculated CLV
+            Calculated CLV (float for scalar inputs, ndarray otherwise)
         """
-        clv = avg_order_value * purchase_frequency * customer_lifespan_years * profit_margin
-        return float(clv)
+        clv = _clv_simple(
+            np.asarray(avg_order_value, dtype=np.float64),
+            np.asarray(purchase_frequency, dtype=np.float64),
+            np.asarray(customer_lifespan_years, dtype=np.float64),
+            np.asarray(profit_margin, dtype=np.float64)
+        )
+        if np.ndim(clv) == 0:
+            return float(clv)
+        return clv
     
     def segment_by_clv(self, data: pd.DataFrame, clv_column: str = 'predicted_clv') -> Dict:
         """
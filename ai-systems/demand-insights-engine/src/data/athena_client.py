@@ -5,13 +5,54 @@ Retrieves customer and sales data from AWS Athena.
 """
 
 import boto3
+from botocore.config import Config
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared across AthenaClient instances (and warm Lambda invocations) so the
+# credential chain, endpoint resolution and HTTPS connection pool are reused
+_SESSION = boto3.Session()
+_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+# Athena column types -> Arrow types used when parsing the CSV result file
+_ARROW_TYPES = {
+    'boolean': pa.bool_(),
+    'tinyint': pa.int8(),
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'float': pa.float32(),
+    'real': pa.float32(),
+    'double': pa.float64(),
+    'decimal': pa.float64(),
+    'date': pa.date32(),
+    'timestamp': pa.timestamp('ms'),
+}
+
+
+def _get_client(service_name: str, region: str):
+    """Return the shared boto3 client for a service and region, creating it on first use."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get((service_name, region))
+        if client is None:
+            client = _SESSION.client(service_name, region_name=region, config=_CLIENT_CONFIG)
+            _CLIENTS[(service_name, region)] = client
+        return client
+
 
 class AthenaClient:
     """
@@ -41,7 +82,8 @@ class AthenaClient:
         else:
             self.output_location = output_location
             
-        self.client = boto3.client('athena', region_name=self.region)
+        self.client = _get_client('athena', self.region)
+        self.s3_client = _get_client('s3', self.region)
     
     def execute_query(self, query: str, max_wait_time: int = 300) -> pd.DataFrame:
         """
@@ -83,17 +125,12 @@ class AthenaClient:
                 
                 time.sleep(2)
             
-            # Get results
-            results = self.client.get_query_results(QueryExecutionId=query_execution_id)
-            
-            # Parse results into DataFrame
-            columns = [col['Label'] for col in results['ResultSet']['ResultSetMetadata']['ColumnInfo']]
-            rows = []
-            
-            for row in results['ResultSet']['Rows'][1:]:  # Skip header row
-                rows.append([field.get('VarCharValue', None) for field in row['Data']])
-            
-            df = pd.DataFrame(rows, columns=columns)
+            # Read the full typed result set from the CSV Athena wrote to S3
+            column_info = self.client.get_query_results(
+                QueryExecutionId=query_execution_id, MaxResults=1
+            )['ResultSet']['ResultSetMetadata']['ColumnInfo']
+            result_location = status['QueryExecution']['ResultConfiguration']['OutputLocation']
+            df = self._read_result_csv(result_location, column_info)
             
             logger.info(f"Query completed: {len(df)} rows returned")
             
@@ -103,6 +140,39 @@ class AthenaClient:
             logger.error(f"Error executing Athena query: {str(e)}")
             raise
     
+    def _read_result_csv(self, result_location: str, column_info: List[Dict]) -> pd.DataFrame:
+        """
+        Parse an Athena CSV result file into a typed DataFrame via Arrow.
+        
+        Args:
+            result_location: s3:// URI of the query's result CSV
+            column_info: ColumnInfo list from the query's result metadata
+            
+        Returns:
+            DataFrame with numeric, date and timestamp columns already typed
+        """
+        bucket, key = result_location[len('s3://'):].split('/', 1)
+        body = self.s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+        
+        columns = [col['Label'] for col in column_info]
+        column_types = {
+            col['Label']: _ARROW_TYPES.get(col['Type'].lower(), pa.string())
+            for col in column_info
+        }
+        
+        # Athena quotes every value and leaves NULLs as bare empty fields
+        table = pa_csv.read_csv(
+            pa.BufferReader(body),
+            read_options=pa_csv.ReadOptions(column_names=columns, skip_rows=1),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False
+            )
+        )
+        
+        return table.to_pandas(use_threads=True, date_as_object=False)
+    
     def get_customer_data(
         self,
         customer_ids: Optional[List[str]] = None,
@@ -246,6 +316,34 @@ class AthenaClient:
         
         return self.execute_query(query)
     
+    def get_price_history_batch(
+        self,
+        product_ids: List[str],
+        max_workers: int = 10
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Retrieve price history for several products concurrently.
+        
+        Each product is fetched with its own Athena query; the queries run
+        in parallel on a thread pool sharing this client's boto3 client.
+        
+        Args:
+            product_ids: Product IDs to fetch
+            max_workers: Maximum number of concurrent Athena queries
+            
+        Returns:
+            Dictionary mapping product ID to its price history DataFrame
+        """
+        if not product_ids:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(product_ids))) as executor:
+            futures = {
+                product_id: executor.submit(self.get_price_history, product_id=product_id)
+                for product_id in product_ids
+            }
+            return {product_id: future.result() for product_id, future in futures.items()}
+    
     def get_customer_segments_data(self) -> pd.DataFrame:
         """
         Retrieve data for customer segmentation analysis.
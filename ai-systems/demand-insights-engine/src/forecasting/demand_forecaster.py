@@ -9,13 +9,106 @@ import pandas as pd
 import numpy as np
 import xgboost as xgb
 from sklearn.model_selection import train_test_split, TimeSeriesSplit
-from sklearn.metrics import mean_squared_error, mean_absolute_error
 import logging
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.warning("Numba not available. Lag/rolling features will use pandas groupby.")
+
+QUANTITY_LAGS = [1, 7, 14, 30]
+ROLLING_WINDOWS = [7, 14, 30]
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True)
+    def _lag_rolling_kernel(quantity, offsets, lags, windows, out_lag, out_mean, out_std):
+        """
+        Fill lag and rolling mean/std outputs for product-contiguous rows.
+        
+        Rows offsets[p]:offsets[p + 1] belong to product p in date order.
+        Lags before a product's first row are 0; rolling values are NaN
+        until a full window is available (pandas min_periods=window).
+        """
+        for p in prange(len(offsets) - 1):
+            start = offsets[p]
+            end = offsets[p + 1]
+            for i in range(start, end):
+                for j in range(lags.shape[0]):
+                    src = i - lags[j]
+                    out_lag[i, j] = quantity[src] if src >= start else 0.0
+                
+                for k in range(windows.shape[0]):
+                    window = windows[k]
+                    first = i - window + 1
+                    if first < start:
+                        out_mean[i, k] = np.nan
+                        out_std[i, k] = np.nan
+                        continue
+                    
+                    total = 0.0
+                    for t in range(first, i + 1):
+                        total += quantity[t]
+                    mean = total / window
+                    
+                    sq_dev = 0.0
+                    for t in range(first, i + 1):
+                        sq_dev += (quantity[t] - mean) ** 2
+                    out_mean[i, k] = mean
+                    out_std[i, k] = np.sqrt(sq_dev / (window - 1))
+
+
+def _lag_rolling_features(
+    quantity: np.ndarray,
+    product_codes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute per-product quantity lags and rolling mean/std with Numba.
+    
+    Args:
+        quantity: Quantity per row, rows in date order
+        product_codes: Integer product code per row (from pd.factorize)
+        
+    Returns:
+        Tuple of (lags, rolling means, rolling stds), one column per entry
+        of QUANTITY_LAGS / ROLLING_WINDOWS, rows in the input order
+    """
+    # Stable sort keeps date order within each product's contiguous segment
+    order = np.argsort(product_codes, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(product_codes))))
+    lags = np.asarray(QUANTITY_LAGS, dtype=np.int64)
+    windows = np.asarray(ROLLING_WINDOWS, dtype=np.int64)
+    
+    n = len(quantity)
+    out_lag = np.empty((n, len(lags)))
+    out_mean = np.empty((n, len(windows)))
+    out_std = np.empty((n, len(windows)))
+    _lag_rolling_kernel(quantity[order], offsets, lags, windows, out_lag, out_mean, out_std)
+    
+    # Scatter back from product order to the caller's row order
+    lag_values = np.empty_like(out_lag)
+    mean_values = np.empty_like(out_mean)
+    std_values = np.empty_like(out_std)
+    lag_values[order] = out_lag
+    mean_values[order] = out_mean
+    std_values[order] = out_std
+    return lag_values, mean_values, std_values
+
+
+def _cuda_available() -> bool:
+    """Return True if CuPy is installed and can see at least one CUDA device."""
+    try:
+        import cupy
+        return cupy.cuda.runtime.getDeviceCount() > 0
+    except Exception:
+        return False
+
 
 class DemandForecaster:
     """Demand forecasting using XGBoost with engineered features."""
@@ -40,8 +133,15 @@ class DemandForecaster:
         self.max_depth = max_depth
         self.learning_rate = learning_rate
         self.lookback_days = lookback_days
-        self.model = None
+        self.device = 'cuda' if _cuda_available() else 'cpu'
+        self.booster = None
         self.feature_importance = None
+        # Engineered frames keyed by a hash of the input columns, so
+        # predict/evaluate on the data passed to fit don't rerun the pipeline
+        self._feat_cache: Dict[tuple, pd.DataFrame] = {}
+        # (engineered frame, prediction matrix): a DMatrix on CPU or a
+        # GPU-resident CuPy array, reused while the same frame is scored
+        self._matrix_cache = None
         
     def engineer_features(
         self,
@@ -58,60 +158,115 @@ class DemandForecaster:
         Returns:
             DataFrame with engineered features
         """
+        # Work on just the columns the features are built from rather than a
+        # full copy of the input (sort_values materialises the frame anyway)
+        columns = ['date', 'product_id', 'quantity'] + [
+            col for col in ('price', 'has_promotion') if col in sales_data.columns
+        ]
+        df = sales_data[columns]
+        
+        # Key on the contents rather than the object, so a frame edited in
+        # place or a new frame at a recycled id never hits a stale entry
+        content_hash = int(pd.util.hash_pandas_object(df, index=True).sum())
+        cache_key = (tuple(columns), len(df), content_hash, include_promotions)
+        cached = self._feat_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         logger.info("Engineering features for demand forecasting...")
         
-        df = sales_data.copy()
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        
-        # Time-based features
-        df['year'] = df['date'].dt.year
-        df['month'] = df['date'].dt.month
-        df['day'] = df['date'].dt.day
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['day_of_year'] = df['date'].dt.dayofyear
-        df['week_of_year'] = df['date'].dt.isocalendar().week
-        df['quarter'] = df['date'].dt.quarter
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-        df['is_month_start'] = df['date'].dt.is_month_start.astype(int)
-        df['is_month_end'] = df['date'].dt.is_month_end.astype(int)
-        
-        # Cyclical encoding for seasonality
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        df['day_of_week_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['day_of_week_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        
-        # Lag features (previous days' sales)
-        for product_id in df['product_id'].unique():
-            mask = df['product_id'] == product_id
-            for lag in [1, 7, 14, 30]:
-                df.loc[mask, f'quantity_lag_{lag}'] = df.loc[mask, 'quantity'].shift(lag)
-        
-        # Rolling statistics
-        for product_id in df['product_id'].unique():
-            mask = df['product_id'] == product_id
-            for window in [7, 14, 30]:
-                df.loc[mask, f'quantity_rolling_mean_{window}'] = df.loc[mask, 'quantity'].rolling(window).mean()
-                df.loc[mask, f'quantity_rolling_std_{window}'] = df.loc[mask, 'quantity'].rolling(window).std()
+        df = df.assign(date=pd.to_datetime(df['date'])).sort_values('date')
+        
+        # Engineered columns are collected here and added in one assign()
+        engineered = {}
+        
+        # Time-based features, decomposed once from a DatetimeIndex and
+        # downcast to the smallest integer type that holds them
+        dates = pd.DatetimeIndex(df['date'])
+        month = dates.month.to_numpy().astype(np.int8)
+        day_of_week = dates.dayofweek.to_numpy().astype(np.int8)
+        engineered.update(
+            year=dates.year.to_numpy().astype(np.int16),
+            month=month,
+            day=dates.day.to_numpy().astype(np.int8),
+            day_of_week=day_of_week,
+            day_of_year=dates.dayofyear.to_numpy().astype(np.int16),
+            week_of_year=dates.isocalendar().week.to_numpy().astype(np.int8),
+            quarter=dates.quarter.to_numpy().astype(np.int8),
+            is_weekend=(day_of_week >= 5).view(np.int8),
+            is_month_start=dates.is_month_start.view(np.int8),
+            is_month_end=dates.is_month_end.view(np.int8)
+        )
+        
+        # Cyclical encoding for seasonality (month and weekday angles packed
+        # into one float32 array so sin/cos each run as a single pass)
+        angles = np.empty((len(df), 2), dtype=np.float32)
+        angles[:, 0] = month * (2 * np.pi / 12)
+        angles[:, 1] = day_of_week * (2 * np.pi / 7)
+        sines = np.sin(angles)
+        cosines = np.cos(angles)
+        engineered['month_sin'] = sines[:, 0]
+        engineered['month_cos'] = cosines[:, 0]
+        engineered['day_of_week_sin'] = sines[:, 1]
+        engineered['day_of_week_cos'] = cosines[:, 1]
+        
+        # Per-product features are computed group-wise on int32 product
+        # codes rather than string IDs; rows stay in date order so the
+        # positional validation split in fit() remains temporal
+        product_codes = pd.factorize(df['product_id'])[0].astype(np.int32)
+        by_product = df.groupby(product_codes, sort=False)
+        quantity_by_product = by_product['quantity']
+        
+        # Lag features (previous days' sales) and rolling statistics (NaN
+        # until each product has a full window)
+        nan_cols = []
+        if NUMBA_AVAILABLE:
+            lag_values, mean_values, std_values = _lag_rolling_features(
+                df['quantity'].to_numpy(dtype=np.float64), product_codes
+            )
+            for j, lag in enumerate(QUANTITY_LAGS):
+                engineered[f'quantity_lag_{lag}'] = lag_values[:, j]
+            for k, window in enumerate(ROLLING_WINDOWS):
+                engineered[f'quantity_rolling_mean_{window}'] = mean_values[:, k]
+                engineered[f'quantity_rolling_std_{window}'] = std_values[:, k]
+                nan_cols += [f'quantity_rolling_mean_{window}', f'quantity_rolling_std_{window}']
+        else:
+            for lag in QUANTITY_LAGS:
+                engineered[f'quantity_lag_{lag}'] = quantity_by_product.shift(lag, fill_value=0)
+            for window in ROLLING_WINDOWS:
+                rolling = quantity_by_product.rolling(window)
+                engineered[f'quantity_rolling_mean_{window}'] = rolling.mean().reset_index(level=0, drop=True)
+                engineered[f'quantity_rolling_std_{window}'] = rolling.std().reset_index(level=0, drop=True)
+                nan_cols += [f'quantity_rolling_mean_{window}', f'quantity_rolling_std_{window}']
         
         # Price features
         if 'price' in df.columns:
-            for product_id in df['product_id'].unique():
-                mask = df['product_id'] == product_id
-                df.loc[mask, 'price_change'] = df.loc[mask, 'price'].pct_change()
-                df.loc[mask, 'price_rolling_mean_7'] = df.loc[mask, 'price'].rolling(7).mean()
+            price_by_product = by_product['price']
+            # Only each product's first row has no previous price; that NaN
+            # is zero-filled with the other warm-up columns below
+            engineered['price_change'] = df['price'] / price_by_product.shift(1) - 1
+            engineered['price_rolling_mean_7'] = (
+                price_by_product.rolling(7).mean().reset_index(level=0, drop=True)
+            )
+            nan_cols += ['price_change', 'price_rolling_mean_7']
         
         # Promotion features
         if include_promotions and 'has_promotion' in df.columns:
-            df['promotion_days'] = df.groupby('product_id')['has_promotion'].transform(
-                lambda x: x.rolling(7, min_periods=1).sum()
+            engineered['promotion_days'] = (
+                by_product['has_promotion'].rolling(7, min_periods=1).sum()
+                .reset_index(level=0, drop=True)
             )
         
-        # Fill NaN values
-        df = df.fillna(method='bfill').fillna(0)
+        df = df.assign(**engineered)
+        
+        # Fill NaN values (lags are already zero-filled by shift)
+        df[nan_cols] = df[nan_cols].fillna(0)
         
         logger.info(f"Engineered {len(df.columns)} features")
+        
+        if len(self._feat_cache) >= 8:
+            self._feat_cache.clear()
+        self._feat_cache[cache_key] = df
         return df
     
     def prepare_training_data(
@@ -129,12 +284,18 @@ class DemandForecaster:
         Returns:
             Tuple of (X, y)
         """
-        # Exclude non-feature columns
+        # Exclude non-feature columns (identifiers and descriptive text such
+        # as product/category names returned by Athena)
         exclude_cols = ['date', 'product_id', 'order_id', target_col]
-        feature_cols = [col for col in features_df.columns if col not in exclude_cols]
+        feature_cols = [
+            col for col in features_df.select_dtypes(include='number').columns
+            if col not in exclude_cols
+        ]
         
-        X = features_df[feature_cols]
-        y = features_df[target_col]
+        # XGBoost stores features as float32; converting here avoids a
+        # silent float64 -> float32 copy on every DMatrix build
+        X = features_df[feature_cols].astype(np.float32, copy=False)
+        y = features_df[target_col].astype(np.float32, copy=False)
         
         return X, y
     
@@ -154,6 +315,8 @@ class DemandForecaster:
             Self for method chaining
         """
         logger.info("Fitting demand forecasting model...")
+        self._feat_cache.clear()
+        self._matrix_cache = None
         
         # Engineer features
         features_df = self.engineer_features(sales_data)
@@ -166,26 +329,58 @@ class DemandForecaster:
         X_train, X_val = X.iloc[:split_idx], X.iloc[split_idx:]
         y_train, y_val = y.iloc[:split_idx], y.iloc[split_idx:]
         
-        # Train XGBoost model
-        self.model = xgb.XGBRegressor(
-            n_estimators=self.n_estimators,
-            max_depth=self.max_depth,
-            learning_rate=self.learning_rate,
-            objective='reg:squarederror',
-            random_state=42
+        if self.device == 'cuda':
+            # Upload once so boosting rounds and later predictions on the
+            # same data don't copy host -> device
+            X_device = self._prediction_matrix(X, features_df)
+            X_fit, X_eval = X_device[:split_idx], X_device[split_idx:]
+        else:
+            X_fit = X_train.to_numpy(np.float32)
+            X_eval = X_val.to_numpy(np.float32)
+        
+        # Quantise features once; the validation matrix reuses the
+        # training bin boundaries
+        feature_names = X.columns.tolist()
+        dtrain = xgb.QuantileDMatrix(
+            X_fit,
+            label=y_train.to_numpy(np.float32),
+            feature_names=feature_names,
+            max_bin=256
+        )
+        dval = xgb.QuantileDMatrix(
+            X_eval,
+            label=y_val.to_numpy(np.float32),
+            feature_names=feature_names,
+            ref=dtrain
         )
         
-        self.model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
+        # Train XGBoost model (histogram trees, on the GPU when one is present)
+        params = {
+            'objective': 'reg:squarederror',
+            'tree_method': 'hist',
+            'device': self.device,
+            'max_depth': self.max_depth,
+            'learning_rate': self.learning_rate,
+            'max_bin': 256,
+            'seed': 42
+        }
+        self.booster = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=self.n_estimators,
+            evals=[(dval, 'val')],
             early_stopping_rounds=10,
-            verbose=False
+            verbose_eval=False
         )
         
-        # Store feature importance
+        # Store feature importance (normalised total gain, as XGBRegressor reports)
+        gain = self.booster.get_score(importance_type='gain')
+        importance = np.array([gain.get(name, 0.0) for name in feature_names])
+        if importance.sum() > 0:
+            importance = importance / importance.sum()
         self.feature_importance = pd.DataFrame({
-            'feature': X.columns,
-            'importance': self.model.feature_importances_
+            'feature': feature_names,
+            'importance': importance
         }).sort_values('importance', ascending=False)
         
         logger.info("Model fitted successfully")
@@ -206,7 +401,7 @@ class DemandForecaster:
         Returns:
             DataFrame with forecasts
         """
-        if self.model is None:
+        if self.booster is None:
             raise ValueError("Model must be fitted before prediction")
         
         logger.info(f"Generating {forecast_horizon}-day demand forecast...")
@@ -216,7 +411,7 @@ class DemandForecaster:
         X, _ = self.prepare_training_data(features_df)
         
         # Generate predictions for historical period
-        predictions = self.model.predict(X)
+        predictions = self._predict(X, features_df)
         
         # Create forecast dataframe
         forecast_df = features_df[['date', 'product_id']].copy()
@@ -240,7 +435,7 @@ class DemandForecaster:
         Returns:
             Dictionary with evaluation metrics
         """
-        if self.model is None:
+        if self.booster is None:
             raise ValueError("Model must be fitted before evaluation")
         
         # Engineer features
@@ -248,16 +443,27 @@ class DemandForecaster:
         X, y_true = self.prepare_training_data(features_df)
         
         # Predict
-        y_pred = self.model.predict(X)
+        y_pred = self._predict(X, features_df)
+        
+        # Calculate metrics from a single residual array
+        y_true = y_true.to_numpy()
+        residuals = y_true - y_pred
+        abs_residuals = np.abs(residuals)
+        ss_res = np.dot(residuals, residuals)
+        
+        rmse = np.sqrt(ss_res / len(residuals))
+        mae = abs_residuals.mean()
         
-        # Calculate metrics
-        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-        mae = mean_absolute_error(y_true, y_pred)
-        mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
+        # MAPE over rows with non-zero demand; zero-quantity days (common for
+        # sparse SKUs) would otherwise turn the metric into inf/NaN
+        nonzero = y_true != 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ape = np.where(nonzero, abs_residuals / np.abs(y_true), 0.0)
+        mape = ape.sum() / max(int(nonzero.sum()), 1) * 100
         
         # R-squared
-        ss_res = np.sum((y_true - y_pred) ** 2)
-        ss_tot = np.sum((y_true - np.mean(y_true)) ** 2)
+        centered = y_true - y_true.mean()
+        ss_tot = np.dot(centered, centered)
         r2 = 1 - (ss_res / ss_tot)
         
         metrics = {
@@ -270,6 +476,37 @@ class DemandForecaster:
         logger.info(f"Evaluation metrics: RMSE={rmse:.2f}, MAE={mae:.2f}, MAPE={mape:.2f}%, R²={r2:.3f}")
         return metrics
     
+    def _prediction_matrix(self, X: pd.DataFrame, features_df: pd.DataFrame):
+        """
+        Return X ready for the booster, reusing it for the same engineered frame.
+        
+        On CUDA this is a GPU-resident CuPy array, otherwise a DMatrix, so
+        predict() and evaluate() on the same data build it only once.
+        """
+        if self._matrix_cache is not None and self._matrix_cache[0] is features_df:
+            return self._matrix_cache[1]
+        
+        if self.device == 'cuda':
+            import cupy as cp
+            matrix = cp.asarray(X.to_numpy(np.float32))
+        else:
+            matrix = xgb.DMatrix(X, feature_names=X.columns.tolist())
+        self._matrix_cache = (features_df, matrix)
+        return matrix
+    
+    def _predict(self, X: pd.DataFrame, features_df: pd.DataFrame) -> np.ndarray:
+        """Predict with the booster, using trees up to the early-stopping best iteration."""
+        iteration_range = (0, self.booster.best_iteration + 1)
+        
+        matrix = self._prediction_matrix(X, features_df)
+        
+        if self.device == 'cuda':
+            import cupy as cp
+            predictions = self.booster.inplace_predict(matrix, iteration_range=iteration_range)
+            return cp.asnumpy(predictions)
+        
+        return self.booster.predict(matrix, iteration_range=iteration_range)
+    
     def get_feature_importance(self, top_n: int = 10) -> pd.DataFrame:
         """
         Get top N most important features.
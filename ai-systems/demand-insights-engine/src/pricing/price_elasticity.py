@@ -4,27 +4,88 @@ Price Elasticity Analysis Module
 Calculates price elasticity of demand and provides pricing optimization recommendations.
 """
 
+import hashlib
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional
-from scipy import stats
-from sklearn.linear_model import LinearRegression
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _log_positive(values: np.ndarray) -> np.ndarray:
+    """
+    Natural log of positive entries, NaN elsewhere.
+    
+    Args:
+        values: Array of prices or quantities
+        
+    Returns:
+        float64 array of log values
+    """
+    return np.log(values, where=values > 0, out=np.full(values.shape, np.nan))
+
+
+def _content_key(data: pd.DataFrame, columns: List[str]) -> tuple:
+    """
+    Identify a DataFrame by the contents of some of its columns.
+    
+    Unlike the frame's identity, the key changes when the frame is edited
+    in place or grows, so cached results never outlive the data they came
+    from, and the cache holds no reference to the frame.
+    
+    Args:
+        data: DataFrame to identify
+        columns: Columns the cached result depends on
+        
+    Returns:
+        Hashable key of column names, row count and content hash
+    """
+    # Digest the row hashes in order; a plain sum would miss rows swapping
+    # values, which moves positions without changing the total
+    row_hashes = pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+    content_hash = hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest()
+    return (tuple(columns), len(data), content_hash)
+
+
+def _classify_elasticity(elasticity: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Label elasticity coefficients as elastic, inelastic or unusual.
+    
+    Args:
+        elasticity: Array of elasticity coefficients
+        
+    Returns:
+        Tuple of (elasticity_type, interpretation) object arrays
+    """
+    conditions = [elasticity < -1, (elasticity > -1) & (elasticity < 0)]
+    elasticity_type = np.select(
+        conditions, ["Elastic", "Inelastic"], default="Unusual"
+    ).astype(object)
+    interpretation = np.select(
+        conditions,
+        [
+            "Demand is highly sensitive to price changes",
+            "Demand is relatively insensitive to price changes"
+        ],
+        default="Positive elasticity detected - verify data quality"
+    ).astype(object)
+    return elasticity_type, interpretation
+
+
 class PriceElasticityAnalyzer:
     """
     Analyzes price elasticity and optimizes pricing strategies.
     
-    Uses regression analysis to calculate price elasticity coefficients
+    Uses log-log regression to calculate price elasticity coefficients
     and provides revenue-maximizing price recommendations.
     """
     
     def __init__(self):
         self.elasticity_models = {}
         self.elasticity_coefficients = {}
+        self._batch_results = None
+        self._by_product = None
     
     def calculate_elasticity(
         self,
@@ -44,72 +105,61 @@ class PriceElasticityAnalyzer:
             Dictionary with elasticity metrics
         """
         try:
+            # Reuse a batch fit over the same data when one is available
+            cached = self._cached_elasticity(data, product_id, category)
+            if cached is not None:
+                return cached
+            
             # Filter data if needed
             if product_id:
-                data = data[data['product_id'] == product_id]
+                data = data.iloc[self._product_positions(data, product_id)]
             elif category:
                 data = data[data['category'] == category]
             
-            if len(data) < 10:
-                raise ValueError("Insufficient data for elasticity calculation")
-            
             # Calculate log transformations for elasticity
-            data = data.copy()
-            data['log_price'] = np.log(data['price'])
-            data['log_quantity'] = np.log(data['quantity'])
+            price = data['price'].to_numpy(dtype=np.float64)
+            quantity = data['quantity'].to_numpy(dtype=np.float64)
+            lp = _log_positive(price)
+            lq = _log_positive(quantity)
             
             # Remove infinite values
-            data = data.replace([np.inf, -np.inf], np.nan).dropna()
+            finite = np.isfinite(lp) & np.isfinite(lq)
+            price, quantity = price[finite], quantity[finite]
+            lp, lq = lp[finite], lq[finite]
             
-            # Fit regression model: log(Q) = a + b*log(P)
-            X = data[['log_price']].values
-            y = data['log_quantity'].values
-            
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            elasticity = model.coef_[0]
-            r_squared = model.score(X, y)
+            if len(lp) < 10:
+                raise ValueError("Insufficient data for elasticity calculation")
             
-            # Calculate confidence interval
-            predictions = model.predict(X)
-            residuals = y - predictions
-            std_error = np.std(residuals) / np.sqrt(len(data))
+            # Fit log(Q) = a + b*log(P) by closed-form OLS
+            lp_m = lp.mean()
+            lq_m = lq.mean()
+            dp = lp - lp_m
+            dq = lq - lq_m
+            var = dp @ dp
+            cov = dp @ dq
+            elasticity = cov / var
+            intercept = lq_m - elasticity * lp_m
+            
+            # Goodness of fit and slope confidence interval from one
+            # residual pass
+            residuals = dq - elasticity * dp
+            ss_res = residuals @ residuals
+            r_squared = 1.0 - ss_res / (dq @ dq)
+            std_error = np.sqrt(ss_res / (len(lp) - 2) / var)
             confidence_interval = 1.96 * std_error
             
-            # Determine elasticity type
-            if elasticity < -1:
-                elasticity_type = "Elastic"
-                interpretation = "Demand is highly sensitive to price changes"
-            elif elasticity > -1 and elasticity < 0:
-                elasticity_type = "Inelastic"
-                interpretation = "Demand is relatively insensitive to price changes"
-            else:
-                elasticity_type = "Unusual"
-                interpretation = "Positive elasticity detected - verify data quality"
-            
-            result = {
-                'elasticity_coefficient': float(elasticity),
-                'r_squared': float(r_squared),
-                'confidence_interval': float(confidence_interval),
-                'elasticity_type': elasticity_type,
-                'interpretation': interpretation,
-                'sample_size': len(data),
-                'price_range': {
-                    'min': float(data['price'].min()),
-                    'max': float(data['price'].max()),
-                    'mean': float(data['price'].mean())
-                },
-                'quantity_range': {
-                    'min': float(data['quantity'].min()),
-                    'max': float(data['quantity'].max()),
-                    'mean': float(data['quantity'].mean())
-                }
-            }
+            result = self._elasticity_result(
+                elasticity=elasticity,
+                r_squared=r_squared,
+                confidence_interval=confidence_interval,
+                sample_size=len(lp),
+                price_range=(price.min(), price.max(), price.mean()),
+                quantity_range=(quantity.min(), quantity.max(), quantity.mean())
+            )
             
             # Store model
             key = product_id or category or 'overall'
-            self.elasticity_models[key] = model
+            self.elasticity_models[key] = (float(intercept), float(elasticity))
             self.elasticity_coefficients[key] = elasticity
             
             logger.info(f"Calculated elasticity for {key}: {elasticity:.3f}")
@@ -120,6 +170,196 @@ class PriceElasticityAnalyzer:
             logger.error(f"Error calculating elasticity: {str(e)}")
             raise
     
+    def _product_positions(self, data: pd.DataFrame, product_id: str) -> np.ndarray:
+        """
+        Row positions of a product, from a per-frame product index.
+        
+        The index is rebuilt only when the product_id column changes, so
+        repeated per-product calls avoid a full equality scan of it.
+        
+        Args:
+            data: DataFrame with a product_id column
+            product_id: Product ID to look up
+            
+        Returns:
+            Integer positions of the product's rows
+        """
+        key = _content_key(data, ['product_id'])
+        if self._by_product is None or self._by_product[0] != key:
+            self._by_product = (key, data.groupby('product_id', sort=False).indices)
+        
+        return self._by_product[1].get(product_id, np.empty(0, dtype=np.intp))
+    
+    def calculate_elasticity_batch(
+        self,
+        data: pd.DataFrame,
+        by: str = 'product_id'
+    ) -> pd.DataFrame:
+        """
+        Calculate price elasticity for every group in one pass.
+        
+        Args:
+            data: DataFrame with columns: price, quantity and the group column
+            by: Column to group by (product_id or category)
+            
+        Returns:
+            DataFrame with group key, elasticity, elasticity_type, r_squared
+            and n per group
+        """
+        try:
+            price = data['price'].to_numpy(dtype=np.float64)
+            quantity = data['quantity'].to_numpy(dtype=np.float64)
+            lp = _log_positive(price)
+            lq = _log_positive(quantity)
+            finite = np.isfinite(lp) & np.isfinite(lq)
+            lp, lq = lp[finite], lq[finite]
+            
+            # Per-group sums of the log columns and their cross products
+            logs = pd.DataFrame({
+                by: data[by].to_numpy()[finite],
+                'lp': lp,
+                'lq': lq,
+                'lp2': lp * lp,
+                'lq2': lq * lq,
+                'lplq': lp * lq,
+                'price': price[finite],
+                'quantity': quantity[finite]
+            })
+            stats_df = logs.groupby(by, sort=False).agg(
+                n=('lp', 'size'),
+                lp_sum=('lp', 'sum'),
+                lq_sum=('lq', 'sum'),
+                lp2_sum=('lp2', 'sum'),
+                lq2_sum=('lq2', 'sum'),
+                lplq_sum=('lplq', 'sum'),
+                price_min=('price', 'min'),
+                price_max=('price', 'max'),
+                price_mean=('price', 'mean'),
+                quantity_min=('quantity', 'min'),
+                quantity_max=('quantity', 'max'),
+                quantity_mean=('quantity', 'mean')
+            )
+            stats_df = stats_df[stats_df['n'] >= 10]
+            
+            # Closed-form OLS slope for every group at once
+            n = stats_df['n'].to_numpy(dtype=np.float64)
+            lp_sum = stats_df['lp_sum'].to_numpy()
+            lq_sum = stats_df['lq_sum'].to_numpy()
+            var = n * stats_df['lp2_sum'].to_numpy() - lp_sum ** 2
+            var_q = n * stats_df['lq2_sum'].to_numpy() - lq_sum ** 2
+            cov = n * stats_df['lplq_sum'].to_numpy() - lp_sum * lq_sum
+            with np.errstate(divide='ignore', invalid='ignore'):
+                beta = cov / var
+                ss_res = np.maximum(var_q - beta * cov, 0.0) / n
+                r_squared = 1.0 - ss_res / (var_q / n)
+                std_error = np.sqrt(ss_res / (n - 2) / (var / n))
+            
+            stats_df = stats_df.assign(
+                elasticity=beta,
+                intercept=(lq_sum - beta * lp_sum) / n,
+                r_squared=r_squared,
+                confidence_interval=1.96 * std_error,
+                elasticity_type=_classify_elasticity(beta)[0]
+            )
+            
+            self.elasticity_models.update(
+                zip(stats_df.index, zip(stats_df['intercept'].tolist(), beta.tolist()))
+            )
+            self.elasticity_coefficients.update(zip(stats_df.index, beta.tolist()))
+            self._batch_results = (_content_key(data, [by, 'price', 'quantity']), by, stats_df)
+            
+            logger.info(f"Calculated elasticity for {len(stats_df)} groups by {by}")
+            
+            return stats_df[['elasticity', 'elasticity_type', 'r_squared', 'n']].reset_index()
+            
+        except Exception as e:
+            logger.error(f"Error calculating batch elasticity: {str(e)}")
+            raise
+    
+    def _cached_elasticity(
+        self,
+        data: pd.DataFrame,
+        product_id: Optional[str],
+        category: Optional[str]
+    ) -> Optional[Dict]:
+        """
+        Look up an elasticity result from the last batch fit.
+        
+        Args:
+            data: DataFrame passed to calculate_elasticity
+            product_id: Optional product ID to analyze
+            category: Optional category to analyze
+            
+        Returns:
+            Elasticity metrics, or None if the batch does not cover the request
+        """
+        if self._batch_results is None:
+            return None
+        
+        source_key, by, stats_df = self._batch_results
+        key = product_id if product_id else category
+        column = 'product_id' if product_id else 'category'
+        if key is None or by != column or key not in stats_df.index:
+            return None
+        if _content_key(data, [by, 'price', 'quantity']) != source_key:
+            return None
+        
+        row = stats_df.loc[key]
+        return self._elasticity_result(
+            elasticity=row['elasticity'],
+            r_squared=row['r_squared'],
+            confidence_interval=row['confidence_interval'],
+            sample_size=int(row['n']),
+            price_range=(row['price_min'], row['price_max'], row['price_mean']),
+            quantity_range=(row['quantity_min'], row['quantity_max'], row['quantity_mean'])
+        )
+    
+    def _elasticity_result(
+        self,
+        elasticity: float,
+        r_squared: float,
+        confidence_interval: float,
+        sample_size: int,
+        price_range: Tuple[float, float, float],
+        quantity_range: Tuple[float, float, float]
+    ) -> Dict:
+        """
+        Build the elasticity metrics dictionary.
+        
+        Args:
+            elasticity: Fitted elasticity coefficient
+            r_squared: Goodness of fit of the log-log regression
+            confidence_interval: Half-width of the 95% interval on the slope
+            sample_size: Number of observations used
+            price_range: (min, max, mean) of price
+            quantity_range: (min, max, mean) of quantity
+            
+        Returns:
+            Dictionary with elasticity metrics
+        """
+        # Determine elasticity type
+        types, interpretations = _classify_elasticity(np.array([elasticity]))
+        elasticity_type, interpretation = types[0], interpretations[0]
+        
+        return {
+            'elasticity_coefficient': float(elasticity),
+            'r_squared': float(r_squared),
+            'confidence_interval': float(confidence_interval),
+            'elasticity_type': elasticity_type,
+            'interpretation': interpretation,
+            'sample_size': sample_size,
+            'price_range': {
+                'min': float(price_range[0]),
+                'max': float(price_range[1]),
+                'mean': float(price_range[2])
+            },
+            'quantity_range': {
+                'min': float(quantity_range[0]),
+                'max': float(quantity_range[1]),
+                'mean': float(quantity_range[2])
+            }
+        }
+    
     def optimize_price(
         self,
         current_price: float,
@@ -149,39 +389,27 @@ class PriceElasticityAnalyzer:
                 else:
                     raise ValueError("Elasticity coefficient required")
             
-            # Calculate optimal price using elasticity formula
-            # Optimal markup = -1 / (elasticity + 1)
             if elasticity >= -1:
                 logger.warning("Inelastic demand - price increase recommended")
-                optimal_markup = 0.5  # Conservative 50% markup
-            else:
-                optimal_markup = -1 / (elasticity + 1)
             
-            optimal_price = cost_per_unit * (1 + optimal_markup)
+            batch = self.optimize_price_batch(
+                np.array([current_price], dtype=np.float64),
+                np.array([current_quantity], dtype=np.float64),
+                np.array([cost_per_unit], dtype=np.float64),
+                np.array([elasticity], dtype=np.float64)
+            )
+            optimal_price = batch['optimal_price'][0]
+            quantity_change_pct = batch['quantity_change_pct'][0] / 100
+            estimated_quantity = batch['estimated_quantity'][0]
+            estimated_revenue = batch['estimated_revenue'][0]
+            estimated_profit = batch['estimated_profit'][0]
+            revenue_change = batch['revenue_change_pct'][0]
+            profit_change = batch['profit_change_pct'][0]
+            recommendation = batch['recommendation'][0]
             
-            # Estimate quantity at optimal price using elasticity
-            price_change_pct = (optimal_price - current_price) / current_price
-            quantity_change_pct = elasticity * price_change_pct
-            estimated_quantity = current_quantity * (1 + quantity_change_pct)
-            
-            # Calculate revenue and profit
             current_revenue = current_price * current_quantity
             current_profit = (current_price - cost_per_unit) * current_quantity
             
-            estimated_revenue = optimal_price * estimated_quantity
-            estimated_profit = (optimal_price - cost_per_unit) * estimated_quantity
-            
-            revenue_change = ((estimated_revenue - current_revenue) / current_revenue) * 100
-            profit_change = ((estimated_profit - current_profit) / current_profit) * 100
-            
-            # Generate recommendation
-            if optimal_price > current_price * 1.05:
-                recommendation = "Increase price"
-            elif optimal_price < current_price * 0.95:
-                recommendation = "Decrease price"
-            else:
-                recommendation = "Maintain current price"
-            
             result = {
                 'current_price': float(current_price),
                 'optimal_price': float(optimal_price),
@@ -212,6 +440,71 @@ class PriceElasticityAnalyzer:
             logger.error(f"Error optimizing price: {str(e)}")
             raise
     
+    def optimize_price_batch(
+        self,
+        prices: np.ndarray,
+        quantities: np.ndarray,
+        costs: np.ndarray,
+        elasticities: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calculate optimal prices for many products at once.
+        
+        Args:
+            prices: Current prices
+            quantities: Current sales quantities
+            costs: Cost per unit
+            elasticities: Price elasticity coefficients
+            
+        Returns:
+            Dictionary of per-product arrays (percentages are in percent)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        costs = np.asarray(costs, dtype=np.float64)
+        elasticities = np.asarray(elasticities, dtype=np.float64)
+        
+        # Optimal markup = -1 / (elasticity + 1); conservative 50% markup
+        # when demand is inelastic
+        inelastic = elasticities >= -1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            markup = np.where(inelastic, 0.5, -1.0 / (elasticities + 1.0))
+        optimal_price = costs * (1 + markup)
+        
+        # Estimate quantity at optimal price using elasticity
+        price_change = (optimal_price - prices) / prices
+        quantity_change = elasticities * price_change
+        estimated_quantity = quantities * (1 + quantity_change)
+        
+        # Calculate revenue and profit
+        current_revenue = prices * quantities
+        current_profit = (prices - costs) * quantities
+        estimated_revenue = optimal_price * estimated_quantity
+        estimated_profit = (optimal_price - costs) * estimated_quantity
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            revenue_change = (estimated_revenue - current_revenue) / current_revenue * 100
+            profit_change = (estimated_profit - current_profit) / current_profit * 100
+        
+        # Generate recommendation
+        recommendation = np.select(
+            [optimal_price > prices * 1.05, optimal_price < prices * 0.95],
+            ["Increase price", "Decrease price"],
+            default="Maintain current price"
+        ).astype(object)
+        
+        return {
+            'optimal_price': optimal_price,
+            'price_change_pct': price_change * 100,
+            'quantity_change_pct': quantity_change * 100,
+            'estimated_quantity': estimated_quantity,
+            'estimated_revenue': estimated_revenue,
+            'estimated_profit': estimated_profit,
+            'revenue_change_pct': revenue_change,
+            'profit_change_pct': profit_change,
+            'recommendation': recommendation
+        }
+    
     def analyze_price_sensitivity(
         self,
         data: pd.DataFrame,
@@ -236,30 +529,37 @@ class PriceElasticityAnalyzer:
             base_price = data['price'].mean()
             base_quantity = data['quantity'].mean()
             
-            sensitivity_data = []
-            for price in price_points:
-                price_change_pct = (price - base_price) / base_price
-                quantity_change_pct = elasticity * price_change_pct
-                estimated_quantity = base_quantity * (1 + quantity_change_pct)
-                estimated_revenue = price * estimated_quantity
-                
-                sensitivity_data.append({
-                    'price': float(price),
-                    'estimated_quantity': float(max(0, estimated_quantity)),
-                    'estimated_revenue': float(max(0, estimated_revenue)),
-                    'price_change_pct': float(price_change_pct * 100)
-                })
+            pp = np.asarray(price_points, dtype=np.float64)
+            price_change_pct = (pp - base_price) / base_price
+            quantity_change_pct = elasticity * price_change_pct
+            estimated_quantity = np.maximum(0.0, base_quantity * (1 + quantity_change_pct))
+            estimated_revenue = np.maximum(0.0, pp * estimated_quantity)
             
             # Find revenue-maximizing price
-            max_revenue_point = max(sensitivity_data, key=lambda x: x['estimated_revenue'])
+            best = int(np.argmax(estimated_revenue))
+            
+            sensitivity_data = [
+                {
+                    'price': price,
+                    'estimated_quantity': quantity,
+                    'estimated_revenue': revenue,
+                    'price_change_pct': change * 100
+                }
+                for price, quantity, revenue, change in zip(
+                    pp.tolist(),
+                    estimated_quantity.tolist(),
+                    estimated_revenue.tolist(),
+                    price_change_pct.tolist()
+                )
+            ]
             
             result = {
                 'base_price': float(base_price),
                 'base_quantity': float(base_quantity),
                 'elasticity': float(elasticity),
                 'sensitivity_curve': sensitivity_data,
-                'revenue_maximizing_price': max_revenue_point['price'],
-                'max_estimated_revenue': max_revenue_point['estimated_revenue']
+                'revenue_maximizing_price': float(pp[best]),
+                'max_estimated_revenue': float(estimated_revenue[best])
             }
             
             return result
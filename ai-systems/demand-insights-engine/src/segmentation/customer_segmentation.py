@@ -7,15 +7,137 @@ for customer segmentation.
 
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score, davies_bouldin_score
 import logging
-from typing import Dict, List, Tuple, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Union
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+NS_PER_DAY = 86_400_000_000_000
+
+RFM_FEATURES = ('recency', 'frequency', 'monetary', 'avg_order_value', 'purchase_frequency')
+
+
+@dataclass
+class RFMMatrix:
+    """
+    RFM features in struct-of-arrays layout.
+    
+    Attributes:
+        ids: Customer IDs, aligned with the rows of X
+        X: C-contiguous float32 matrix of shape (N, len(feature_names))
+        lifetime: Days since each customer's first order
+        feature_names: Column names of X
+    """
+    ids: np.ndarray
+    X: np.ndarray
+    lifetime: np.ndarray
+    feature_names: Tuple[str, ...] = RFM_FEATURES
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @classmethod
+    def from_dataframe(cls, rfm_data: pd.DataFrame) -> 'RFMMatrix':
+        """
+        Build an RFMMatrix from a DataFrame with RFM feature columns.
+        
+        Args:
+            rfm_data: DataFrame with customer_id and RFM feature columns
+            
+        Returns:
+            RFMMatrix with missing values filled by column medians
+        """
+        features = rfm_data[list(RFM_FEATURES)]
+        features = features.fillna(features.median())
+        if 'customer_lifetime' in rfm_data:
+            lifetime = rfm_data['customer_lifetime'].to_numpy()
+        else:
+            lifetime = np.zeros(len(rfm_data), dtype=np.int64)
+        
+        return cls(
+            ids=rfm_data['customer_id'].to_numpy(),
+            X=np.ascontiguousarray(features.to_numpy(dtype=np.float32)),
+            lifetime=lifetime
+        )
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Convert to the DataFrame layout returned by earlier versions.
+        
+        Returns:
+            DataFrame with customer_id and RFM feature columns
+        """
+        columns = dict(zip(self.feature_names, self.X.T))
+        return pd.DataFrame({
+            'customer_id': self.ids,
+            'recency': columns['recency'].astype(np.int64),
+            'frequency': columns['frequency'].astype(np.int64),
+            'monetary': columns['monetary'].astype(np.float64),
+            'avg_order_value': columns['avg_order_value'].astype(np.float64),
+            'days_since_first_order': self.lifetime,
+            'customer_lifetime': self.lifetime,
+            'purchase_frequency': columns['purchase_frequency'].astype(np.float64)
+        })
+
+
+def _as_rfm_matrix(rfm_data: Union[RFMMatrix, pd.DataFrame]) -> RFMMatrix:
+    """
+    Accept either layout, converting DataFrames for backward compatibility.
+    
+    Args:
+        rfm_data: RFMMatrix or DataFrame with RFM features
+        
+    Returns:
+        RFMMatrix
+    """
+    if isinstance(rfm_data, RFMMatrix):
+        return rfm_data
+    return RFMMatrix.from_dataframe(rfm_data)
+
+
+def _name_segments(
+    recency: np.ndarray,
+    frequency: np.ndarray,
+    monetary: np.ndarray
+) -> np.ndarray:
+    """
+    Assign descriptive names to segments based on characteristics.
+    
+    Rules are applied from lowest to highest priority so that the first
+    matching rule of the original if/elif chain wins.
+    
+    Args:
+        recency: Mean recency per segment
+        frequency: Mean frequency per segment
+        monetary: Mean monetary value per segment
+        
+    Returns:
+        Array of segment names
+    """
+    r, f, m = recency, frequency, monetary
+    names = np.full(len(r), "Promising", dtype=object)
+    
+    # Low value, low frequency = Lost
+    names[r > 365] = "Lost"
+    # High recency, high past value = Hibernating
+    names[(r > 180) & (m > 300)] = "Hibernating"
+    # High recency, low frequency = At Risk
+    names[(r > 180) & (f < 3)] = "At Risk"
+    # Recent customers = New Customers
+    names[(r < 30) & (f <= 2)] = "New Customers"
+    # High frequency, low recency = Potential Loyalists
+    names[(f > 5) & (r < 90)] = "Potential Loyalists"
+    # High value, low recency = Loyal Customers
+    names[(m > 500) & (r < 60)] = "Loyal Customers"
+    # High value, high frequency, low recency = Champions
+    names[(m > 1000) & (f > 10) & (r < 30)] = "Champions"
+    
+    return names
+
 
 class CustomerSegmentation:
     """Customer segmentation using K-Means clustering on RFM features."""
@@ -32,6 +154,11 @@ class CustomerSegmentation:
         self.max_clusters = max_clusters
         self.model = None
         self.scaler = StandardScaler()
+        self._mean = None
+        self._scale = None
+        self._centers = None
+        self._center_sqnorms = None
+        self._sweep_models = {}
         self.optimal_k = None
         self.segment_profiles = None
         
@@ -39,7 +166,7 @@ class CustomerSegmentation:
         self,
         customer_data: pd.DataFrame,
         reference_date: Optional[datetime] = None
-    ) -> pd.DataFrame:
+    ) -> RFMMatrix:
         """
         Calculate RFM (Recency, Frequency, Monetary) features.
         
@@ -48,38 +175,58 @@ class CustomerSegmentation:
             reference_date: Reference date for recency calculation
             
         Returns:
-            DataFrame with RFM features
+            RFMMatrix with RFM features (use to_dataframe() for a DataFrame)
         """
+        order_date = customer_data['order_date']
+        if not pd.api.types.is_datetime64_any_dtype(order_date):
+            order_date = pd.to_datetime(order_date)
+        
         if reference_date is None:
-            reference_date = customer_data['order_date'].max()
+            reference_date = order_date.max()
         
         logger.info(f"Calculating RFM features with reference date: {reference_date}")
         
-        # Calculate RFM metrics
-        rfm = customer_data.groupby('customer_id').agg({
-            'order_date': lambda x: (reference_date - x.max()).days,  # Recency
-            'order_id': 'count',  # Frequency
-            'order_total': 'sum'  # Monetary
-        }).reset_index()
-        
-        rfm.columns = ['customer_id', 'recency', 'frequency', 'monetary']
-        
-        # Add additional features
-        rfm['avg_order_value'] = customer_data.groupby('customer_id')['order_total'].mean().values
-        rfm['days_since_first_order'] = customer_data.groupby('customer_id')['order_date'].apply(
-            lambda x: (reference_date - x.min()).days
-        ).values
-        
-        # Calculate customer lifetime (in days)
-        rfm['customer_lifetime'] = rfm['days_since_first_order']
-        
-        # Calculate purchase frequency (orders per day)
-        rfm['purchase_frequency'] = rfm['frequency'] / (rfm['customer_lifetime'] + 1)
+        # Order dates as int64 nanoseconds so min/max run over plain integers
+        od_ns = order_date.to_numpy(dtype='datetime64[ns]').view('i8')
+        ref_ns = pd.Timestamp(reference_date).value
+        
+        # Calculate RFM metrics in a single groupby pass
+        agg = pd.DataFrame({
+            'customer_id': customer_data['customer_id'].to_numpy(),
+            'od_ns': od_ns,
+            'order_id': customer_data['order_id'].to_numpy(),
+            'order_total': customer_data['order_total'].to_numpy()
+        }).groupby('customer_id').agg(
+            first_order=('od_ns', 'min'),
+            last_order=('od_ns', 'max'),
+            frequency=('order_id', 'count'),
+            monetary=('order_total', 'sum')
+        ).reset_index()
+        
+        recency = (ref_ns - agg['last_order'].to_numpy()) // NS_PER_DAY
+        lifetime = (ref_ns - agg['first_order'].to_numpy()) // NS_PER_DAY
+        frequency = agg['frequency'].to_numpy()
+        monetary = agg['monetary'].to_numpy()
+        
+        # Feature matrix in RFM_FEATURES order; missing values are filled
+        # here once so fit/predict can use the buffer as is
+        X = np.empty((len(agg), len(RFM_FEATURES)), dtype=np.float32)
+        X[:, 0] = recency
+        X[:, 1] = frequency
+        X[:, 2] = monetary
+        X[:, 3] = monetary / frequency
+        # Purchase frequency (orders per day)
+        X[:, 4] = frequency / (lifetime + 1)
+        missing = np.isnan(X)
+        if missing.any():
+            X[missing] = np.take(np.nanmedian(X, axis=0), np.nonzero(missing)[1])
+        
+        rfm = RFMMatrix(ids=agg['customer_id'].to_numpy(), X=X, lifetime=lifetime)
         
         logger.info(f"Calculated RFM for {len(rfm)} customers")
         return rfm
     
-    def find_optimal_clusters(self, features: pd.DataFrame) -> int:
+    def find_optimal_clusters(self, features: np.ndarray) -> int:
         """
         Find optimal number of clusters using elbow method and silhouette score.
         
@@ -89,21 +236,70 @@ class CustomerSegmentation:
         Returns:
             Optimal number of clusters
         """
+        # Only needed for the k sweep, so kept out of module import
+        from scipy.spatial.distance import cdist
+        from sklearn.metrics import silhouette_score
+        
         logger.info("Finding optimal number of clusters...")
         
+        features = np.asarray(features, dtype=np.float32)
+        n = len(features)
+        
         inertias = []
         silhouette_scores = []
-        davies_bouldin_scores = []
+        self._sweep_models = {}
+        
+        # Size-aware regime: tiny inputs use the elbow only, large inputs
+        # estimate silhouette on a small fixed sample
+        max_clusters = self.max_clusters
+        if n <= max_clusters + 1:
+            max_clusters = max(2, n // 3)
+        use_silhouette = n >= 50
+        silhouette_sample = 2000 if n > 10_000 else min(5000, n)
+        if use_silhouette:
+            logger.info(f"Silhouette on {silhouette_sample} of {n} customers, k up to {max_clusters}")
+        else:
+            logger.info(f"Only {n} customers, using elbow method only, k up to {max_clusters}")
         
-        k_range = range(2, min(self.max_clusters + 1, len(features)))
+        k_range = range(2, min(max_clusters + 1, n))
         
+        # Points used to pick the farthest-point seed for each next k
+        rng = np.random.default_rng(42)
+        features_sample = features[rng.choice(n, size=min(2048, n), replace=False)]
+        prev_centers = None
+        
+        # Mini-batch fits are enough to rank candidate k; silhouette is
+        # estimated on a subsample to avoid O(n^2) pairwise distances
         for k in k_range:
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+            if prev_centers is None:
+                init = 'k-means++'
+            else:
+                # Warm start from the k-1 solution plus the farthest point
+                farthest_point_idx = np.argmax(np.min(cdist(features_sample, prev_centers), axis=1))
+                init = np.vstack([prev_centers, features_sample[farthest_point_idx]])
+            
+            kmeans = MiniBatchKMeans(
+                n_clusters=k,
+                init=init,
+                batch_size=min(4096, n),
+                n_init=1,
+                max_iter=50 if prev_centers is not None else 100,
+                random_state=42
+            )
             labels = kmeans.fit_predict(features)
+            prev_centers = kmeans.cluster_centers_
+            self._sweep_models[k] = kmeans
             
             inertias.append(kmeans.inertia_)
-            silhouette_scores.append(silhouette_score(features, labels))
-            davies_bouldin_scores.append(davies_bouldin_score(features, labels))
+            if use_silhouette:
+                silhouette_scores.append(
+                    silhouette_score(features, labels, sample_size=silhouette_sample, random_state=42)
+                )
+            
+            # Stop once adding a cluster barely reduces inertia; the elbow
+            # has been passed
+            if len(inertias) >= 3 and inertias[-2] - inertias[-1] < 0.01 * inertias[0]:
+                break
         
         # Find elbow point (maximum second derivative)
         if len(inertias) >= 3:
@@ -112,57 +308,75 @@ class CustomerSegmentation:
         else:
             elbow_k = 3
         
-        # Find best silhouette score
-        best_silhouette_k = np.argmax(silhouette_scores) + 2
-        
-        # Use average of elbow and silhouette methods
-        optimal_k = int((elbow_k + best_silhouette_k) / 2)
-        optimal_k = max(2, min(optimal_k, self.max_clusters))
+        if silhouette_scores:
+            # Find best silhouette score
+            best_silhouette_k = np.argmax(silhouette_scores) + 2
+            
+            # Use average of elbow and silhouette methods
+            optimal_k = int((elbow_k + best_silhouette_k) / 2)
+        else:
+            best_silhouette_k = None
+            optimal_k = int(elbow_k)
+        optimal_k = max(2, min(optimal_k, max_clusters))
         
         logger.info(f"Optimal clusters: {optimal_k} (elbow: {elbow_k}, silhouette: {best_silhouette_k})")
         
         return optimal_k
     
-    def fit(self, rfm_data: pd.DataFrame) -> 'CustomerSegmentation':
+    def fit(self, rfm_data: Union[RFMMatrix, pd.DataFrame]) -> 'CustomerSegmentation':
         """
         Fit K-Means clustering model.
         
         Args:
-            rfm_data: DataFrame with RFM features
+            rfm_data: RFMMatrix (or DataFrame) with RFM features
             
         Returns:
             Self for method chaining
         """
-        # Select features for clustering
-        feature_cols = ['recency', 'frequency', 'monetary', 'avg_order_value', 'purchase_frequency']
-        features = rfm_data[feature_cols].copy()
-        
-        # Handle missing values
-        features = features.fillna(features.median())
+        rfm = _as_rfm_matrix(rfm_data)
         
-        # Scale features
-        features_scaled = self.scaler.fit_transform(features)
+        # Scale features; the fitted parameters are cached as float32 so that
+        # fit and predict share the same fused transform
+        self.scaler.fit(rfm.X)
+        self._mean = self.scaler.mean_.astype(np.float32)
+        self._scale = self.scaler.scale_.astype(np.float32)
+        features_scaled = np.ascontiguousarray(self._scale_features(rfm.X))
         
         # Determine optimal number of clusters if not specified
         if self.n_clusters is None:
             self.optimal_k = self.find_optimal_clusters(features_scaled)
         else:
             self.optimal_k = self.n_clusters
+            self._sweep_models = {}
         
         # Fit K-Means
         logger.info(f"Fitting K-Means with {self.optimal_k} clusters...")
-        self.model = KMeans(n_clusters=self.optimal_k, random_state=42, n_init=10)
+        sweep_model = self._sweep_models.get(self.optimal_k)
+        if sweep_model is not None:
+            # Refine the sweep solution instead of 10 fresh restarts
+            self.model = KMeans(
+                n_clusters=self.optimal_k,
+                init=sweep_model.cluster_centers_,
+                n_init=1,
+                random_state=42
+            )
+        else:
+            self.model = KMeans(n_clusters=self.optimal_k, random_state=42, n_init=10)
         self.model.fit(features_scaled)
         
+        # Cache centers for predict_fast
+        self._centers = self.model.cluster_centers_.astype(np.float32)
+        self._center_sqnorms = (self._centers ** 2).sum(axis=1)
+        
         logger.info("K-Means model fitted successfully")
         return self
     
-    def predict(self, rfm_data: pd.DataFrame) -> np.ndarray:
+    def predict(self, rfm_data: Union[RFMMatrix, pd.DataFrame]) -> np.ndarray:
         """
         Predict cluster labels for customers.
         
         Args:
-            rfm_data: DataFrame with RFM features
+            rfm_data: RFMMatrix (or DataFrame) with RFM features
             
         Returns:
             Array of cluster labels
@@ -170,43 +384,90 @@ class CustomerSegmentation:
         if self.model is None:
             raise ValueError("Model must be fitted before prediction")
         
-        feature_cols = ['recency', 'frequency', 'monetary', 'avg_order_value', 'purchase_frequency']
-        features = rfm_data[feature_cols].copy()
-        features = features.fillna(features.median())
-        features_scaled = self.scaler.transform(features)
+        features_scaled = self._scale_features(_as_rfm_matrix(rfm_data).X)
         
         return self.model.predict(features_scaled)
     
-    def create_segment_profiles(self, rfm_data: pd.DataFrame, labels: np.ndarray) -> pd.DataFrame:
+    def predict_fast(self, x: np.ndarray) -> np.ndarray:
+        """
+        Assign already-scaled feature rows to the nearest cluster center.
+        
+        Intended for online scoring of one or a few customers, where the
+        validation in KMeans.predict dominates the cost.
+        
+        Args:
+            x: Scaled float32 features, shape (D,) or (B, D)
+            
+        Returns:
+            Cluster label (scalar array for a single row) or array of labels
+        """
+        if self._centers is None:
+            raise ValueError("Model must be fitted before prediction")
+        
+        d = (
+            self._center_sqnorms
+            - 2 * (x @ self._centers.T)
+            + (x * x).sum(axis=-1, keepdims=True)
+        )
+        return np.argmin(d, axis=-1)
+    
+    def _scale_features(self, X: np.ndarray) -> np.ndarray:
+        """
+        Standardize features with the cached scaler parameters.
+        
+        Args:
+            X: float32 matrix of clustering features
+            
+        Returns:
+            Contiguous float32 array of scaled features
+        """
+        return (X - self._mean) / self._scale
+    
+    def create_segment_profiles(
+        self,
+        rfm_data: Union[RFMMatrix, pd.DataFrame],
+        labels: np.ndarray
+    ) -> pd.DataFrame:
         """
         Create profiles for each segment.
         
         Args:
-            rfm_data: DataFrame with RFM features
+            rfm_data: RFMMatrix (or DataFrame) with RFM features
             labels: Cluster labels
             
         Returns:
             DataFrame with segment profiles
         """
-        rfm_with_labels = rfm_data.copy()
+        rfm = _as_rfm_matrix(rfm_data)
+        
+        # Aggregate in float64 so segment totals do not accumulate float32 error
+        rfm_with_labels = pd.DataFrame(
+            rfm.X.astype(np.float64), columns=list(rfm.feature_names)
+        )
         rfm_with_labels['segment'] = labels
         
         # Calculate segment statistics
-        profiles = rfm_with_labels.groupby('segment').agg({
-            'customer_id': 'count',
-            'recency': ['mean', 'median'],
-            'frequency': ['mean', 'median'],
-            'monetary': ['mean', 'median', 'sum'],
-            'avg_order_value': ['mean', 'median'],
-            'purchase_frequency': ['mean', 'median']
-        }).reset_index()
-        
-        # Flatten column names
-        profiles.columns = ['_'.join(col).strip('_') for col in profiles.columns.values]
-        profiles.rename(columns={'segment': 'segment', 'customer_id_count': 'customer_count'}, inplace=True)
+        profiles = rfm_with_labels.groupby('segment').agg(
+            customer_count=('segment', 'size'),
+            recency_mean=('recency', 'mean'),
+            recency_median=('recency', 'median'),
+            frequency_mean=('frequency', 'mean'),
+            frequency_median=('frequency', 'median'),
+            monetary_mean=('monetary', 'mean'),
+            monetary_median=('monetary', 'median'),
+            monetary_sum=('monetary', 'sum'),
+            avg_order_value_mean=('avg_order_value', 'mean'),
+            avg_order_value_median=('avg_order_value', 'median'),
+            purchase_frequency_mean=('purchase_frequency', 'mean'),
+            purchase_frequency_median=('purchase_frequency', 'median')
+        ).reset_index()
         
         # Add segment names based on characteristics
-        profiles['segment_name'] = profiles.apply(self._name_segment, axis=1)
+        profiles['segment_name'] = _name_segments(
+            profiles['recency_mean'].to_numpy(),
+            profiles['frequency_mean'].to_numpy(),
+            profiles['monetary_mean'].to_numpy()
+        )
         
         # Calculate segment value (total monetary)
         profiles['total_value'] = profiles['monetary_sum']
@@ -217,44 +478,6 @@ class CustomerSegmentation:
         
         return profiles
     
-    def _name_segment(self, row: pd.Series) -> str:
-        """
-        Assign descriptive name to segment based on characteristics.
-        
-        Args:
-            row: Segment profile row
-            
-        Returns:
-            Segment name
-        """
-        recency = row['recency_mean']
-        frequency = row['frequency_mean']
-        monetary = row['monetary_mean']
-        
-        # High value, high frequency, low recency = Champions
-        if monetary > 1000 and frequency > 10 and recency < 30:
-            return "Champions"
-        # High value, low recency = Loyal Customers
-        elif monetary > 500 and recency < 60:
-            return "Loyal Customers"
-        # High frequency, low recency = Potential Loyalists
-        elif frequency > 5 and recency < 90:
-            return "Potential Loyalists"
-        # Recent customers = New Customers
-        elif recency < 30 and frequency <= 2:
-            return "New Customers"
-        # High recency, low frequency = At Risk
-        elif recency > 180 and frequency < 3:
-            return "At Risk"
-        # High recency, high past value = Hibernating
-        elif recency > 180 and monetary > 300:
-            return "Hibernating"
-        # Low value, low frequency = Lost
-        elif recency > 365:
-            return "Lost"
-        else:
-            return "Promising"
-    
     def get_segment_summary(self) -> Dict:
         """
         Get summary of all segments.
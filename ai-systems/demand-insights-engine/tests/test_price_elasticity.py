@@ -0,0 +1,83 @@
+"""
+Unit Tests for the price elasticity analyzer
+Covers reuse of batch results and per-product lookups across calls
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pricing.price_elasticity import PriceElasticityAnalyzer  # noqa: E402
+
+
+def make_sales(elasticities: dict, n_rows: int = 40, seed: int = 0) -> pd.DataFrame:
+    """Build price/quantity rows following Q = 100 * P^elasticity per product"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for product_id, elasticity in elasticities.items():
+        price = rng.uniform(5, 50, n_rows)
+        quantity = 100 * price ** elasticity * rng.uniform(0.95, 1.05, n_rows)
+        frames.append(pd.DataFrame({'product_id': product_id, 'price': price, 'quantity': quantity}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def fresh_elasticity(data: pd.DataFrame, product_id: str) -> float:
+    """Elasticity from an analyzer with no cached state"""
+    result = PriceElasticityAnalyzer().calculate_elasticity(data, product_id=product_id)
+    return result['elasticity_coefficient']
+
+
+class TestBatchReuse:
+    """calculate_elasticity reuses a batch fit only for unchanged data"""
+
+    def test_matches_batch_for_same_data(self):
+        data = make_sales({'a': -1.5, 'b': -0.3})
+        analyzer = PriceElasticityAnalyzer()
+        analyzer.calculate_elasticity_batch(data)
+
+        result = analyzer.calculate_elasticity(data, product_id='a')
+
+        assert result['elasticity_coefficient'] == pytest.approx(fresh_elasticity(data, 'a'))
+
+    def test_frame_changed_in_place(self):
+        data = make_sales({'a': -1.5, 'b': -0.3})
+        analyzer = PriceElasticityAnalyzer()
+        analyzer.calculate_elasticity_batch(data)
+
+        data['quantity'] = 100 * data['price'] ** -0.3
+        result = analyzer.calculate_elasticity(data, product_id='a')
+
+        assert result['elasticity_coefficient'] == pytest.approx(-0.3)
+        assert result['elasticity_coefficient'] == pytest.approx(fresh_elasticity(data, 'a'))
+
+
+class TestProductPositions:
+    """Per-product lookups follow edits to the product rows"""
+
+    def test_product_ids_changed_in_place(self):
+        data = make_sales({'a': -1.5, 'b': -0.3})
+        analyzer = PriceElasticityAnalyzer()
+        analyzer.calculate_elasticity(data, product_id='a')
+
+        data['product_id'] = data['product_id'].map({'a': 'b', 'b': 'a'})
+        result = analyzer.calculate_elasticity(data, product_id='a')
+
+        assert result['elasticity_coefficient'] == pytest.approx(fresh_elasticity(data, 'a'))
+        assert result['elasticity_coefficient'] == pytest.approx(-0.3, abs=0.1)
+
+    def test_rows_appended(self):
+        data = make_sales({'a': -1.5, 'b': -0.3})
+        analyzer = PriceElasticityAnalyzer()
+        analyzer.calculate_elasticity(data, product_id='a')
+
+        for price in (60.0, 80.0, 100.0):
+            data.loc[len(data)] = ['a', price, 1.0]
+        result = analyzer.calculate_elasticity(data, product_id='a')
+
+        assert result['sample_size'] == 43
+        assert result['elasticity_coefficient'] == pytest.approx(fresh_elasticity(data, 'a'))
@@ -6,11 +6,172 @@ Analyzes competitor pricing, market share, and competitive positioning across re
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.warning("Numba not available. Competitor price statistics will use pandas groupby.")
+
+# Frames at least this long get their price statistics from the Numba
+# kernel; below it the JIT compile costs more than the groupbys it replaces
+NUMBA_MIN_ROWS = 100_000
+
+# Upper bounds of the regional price coefficient-of-variation classes
+_CV_BINS = np.array([0.05, 0.15])
+_CV_LABELS = np.array(['Uniform Pricing', 'Moderate Variation', 'Regional Pricing'], dtype=object)
+
+# Upper bounds of the HHI market concentration classes
+_HHI_BINS = np.array([1500.0, 2500.0])
+_HHI_LABELS = np.array(['Low (Competitive)', 'Moderate', 'High (Concentrated)'], dtype=object)
+
+
+def _prepare_frame(data: pd.DataFrame, key_columns: List[str],
+                   value_columns: List[str] = ()) -> pd.DataFrame:
+    """
+    Return data with key columns as categoricals and Arrow-backed value
+    columns as float64.
+    
+    Grouping on category codes avoids re-hashing the competitor and region
+    strings in every groupby, and the pivots and arithmetic below run on
+    NumPy float columns.
+    """
+    converted = {
+        col: data[col].astype('category')
+        for col in key_columns if data[col].dtype.name != 'category'
+    }
+    converted.update({
+        col: data[col].astype(np.float64)
+        for col in value_columns if isinstance(data[col].dtype, pd.ArrowDtype)
+    })
+    if not converted:
+        return data
+    data = data.copy(deep=False)
+    for col, values in converted.items():
+        data[col] = values
+    return data
+
+
+if NUMBA_AVAILABLE:
+    @njit
+    def _price_stats_kernel(comp_codes, region_codes, prices, n_comp, n_region):
+        """
+        Accumulate per-competitor and per-(region, competitor) price stats.
+        
+        Codes of -1 mark missing keys and NaN prices are skipped, as in
+        pandas groupby. Per competitor returns row count, price count,
+        mean, std (ddof=1), min and max; per region x competitor cell
+        returns row count and mean price.
+        """
+        size = np.zeros(n_comp, dtype=np.int64)
+        count = np.zeros(n_comp, dtype=np.int64)
+        total = np.zeros(n_comp)
+        min_x = np.full(n_comp, np.inf)
+        max_x = np.full(n_comp, -np.inf)
+        cell_rows = np.zeros((n_region, n_comp), dtype=np.int64)
+        cell_count = np.zeros((n_region, n_comp), dtype=np.int64)
+        cell_total = np.zeros((n_region, n_comp))
+        
+        for i in range(prices.shape[0]):
+            c = comp_codes[i]
+            if c < 0:
+                continue
+            size[c] += 1
+            r = region_codes[i]
+            if r >= 0:
+                cell_rows[r, c] += 1
+            x = prices[i]
+            if np.isnan(x):
+                continue
+            count[c] += 1
+            total[c] += x
+            if x < min_x[c]:
+                min_x[c] = x
+            if x > max_x[c]:
+                max_x[c] = x
+            if r >= 0:
+                cell_count[r, c] += 1
+                cell_total[r, c] += x
+        
+        mean = np.full(n_comp, np.nan)
+        for c in range(n_comp):
+            if count[c] > 0:
+                mean[c] = total[c] / count[c]
+        
+        # Second pass over deviations from the mean, for a stable std
+        sq_dev = np.zeros(n_comp)
+        for i in range(prices.shape[0]):
+            c = comp_codes[i]
+            if c >= 0 and not np.isnan(prices[i]):
+                sq_dev[c] += (prices[i] - mean[c]) ** 2
+        std = np.full(n_comp, np.nan)
+        for c in range(n_comp):
+            if count[c] > 1:
+                std[c] = np.sqrt(sq_dev[c] / (count[c] - 1))
+            if count[c] == 0:
+                min_x[c] = np.nan
+                max_x[c] = np.nan
+        
+        cell_mean = np.full((n_region, n_comp), np.nan)
+        for r in range(n_region):
+            for c in range(n_comp):
+                if cell_count[r, c] > 0:
+                    cell_mean[r, c] = cell_total[r, c] / cell_count[r, c]
+        
+        return size, mean, std, min_x, max_x, cell_rows, cell_mean
+
+
+def _grouped_price_stats(data: pd.DataFrame,
+                         competitor_column: str,
+                         region_column: str,
+                         price_column: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute competitor price statistics and the region x competitor mean
+    price table in one Numba pass over factorized keys.
+    
+    Returns:
+        Tuple of (per-competitor stats without median_price, region x
+        competitor mean prices), both ordered by first appearance like
+        groupby(sort=False)
+    """
+    comp_codes, competitors = pd.factorize(data[competitor_column], sort=False)
+    region_codes, regions = pd.factorize(data[region_column], sort=False)
+    
+    size, mean, std, min_x, max_x, cell_rows, cell_mean = _price_stats_kernel(
+        comp_codes.astype(np.int64),
+        region_codes.astype(np.int64),
+        data[price_column].to_numpy(dtype=np.float64, na_value=np.nan),
+        len(competitors),
+        len(regions)
+    )
+    
+    competitors = np.asarray(competitors, dtype=object)
+    stats = pd.DataFrame({
+        'avg_price': mean,
+        'min_price': min_x,
+        'max_price': max_x,
+        'price_std': std,
+        'regions_present': (cell_rows > 0).sum(axis=0),
+        'total_products': size
+    }, index=pd.Index(competitors, name=competitor_column))
+    
+    # Keep only the cells groupby would have produced
+    has_rows = cell_rows > 0
+    region_mask = has_rows.any(axis=1)
+    comp_mask = has_rows.any(axis=0)
+    region_comp_mean = pd.DataFrame(
+        cell_mean[np.ix_(region_mask, comp_mask)],
+        index=pd.Index(np.asarray(regions, dtype=object)[region_mask], name=region_column),
+        columns=pd.Index(competitors[comp_mask], name=competitor_column)
+    )
+    
+    return stats, region_comp_mean
+
 
 class CompetitorAnalyzer:
     """
@@ -40,187 +201,217 @@ class CompetitorAnalyzer:
             Dictionary with competitor pricing analysis
         """
         try:
-            # Calculate competitor statistics
-            competitor_stats = self._calculate_competitor_stats(
-                data, competitor_column, price_column, region_column
-            )
+            data = _prepare_frame(data, [competitor_column, region_column], [price_column])
             
-            # Identify price leaders
-            price_leaders = self._identify_price_leaders(
-                data, competitor_column, price_column, region_column
-            )
+            # Group once and share the results across the helpers
+            comp_group = data.groupby(competitor_column, sort=False, observed=True)
+            if NUMBA_AVAILABLE and len(data) >= NUMBA_MIN_ROWS:
+                stats, region_comp_mean = _grouped_price_stats(
+                    data, competitor_column, region_column, price_column
+                )
+                stats.insert(1, 'median_price', comp_group[price_column].median().to_numpy())
+            else:
+                stats = self._competitor_stats_frame(comp_group, price_column, region_column)
+                region_comp_mean = data.groupby(
+                    [region_column, competitor_column], sort=False, observed=True
+                )[price_column].mean().unstack()
             
-            # Calculate price positioning
-            price_positioning = self._calculate_price_positioning(
-                data, competitor_column, price_column
+            return self._summarize_competitor_pricing(
+                stats, region_comp_mean, data[price_column].mean()
             )
+        
+        except Exception as e:
+            logger.error(f"Error analyzing competitor pricing: {str(e)}")
+            raise
+    
+    def analyze_competitor_pricing_stats(self, competitor_stats: pd.DataFrame,
+                                         regional_prices: pd.DataFrame,
+                                         competitor_column: str = 'competitor',
+                                         region_column: str = 'region',
+                                         price_column: str = 'avg_price') -> Dict[str, Any]:
+        """
+        Analyze competitor pricing strategies from pre-aggregated data.
+        
+        Takes the output of AthenaClient.get_competitor_statistics and
+        get_market_share, so only labeling and ranking happen here.
+        
+        Args:
+            competitor_stats: One row per competitor with avg/median/min/max
+                price, price_std, regions_present, total_products and
+                price_count
+            regional_prices: One row per region x competitor with mean price
+            competitor_column: Name of competitor column
+            region_column: Name of region column
+            price_column: Name of the mean price column in regional_prices
+        
+        Returns:
+            Dictionary with competitor pricing analysis
+        """
+        try:
+            stats = competitor_stats.set_index(competitor_column)
             
-            # Analyze regional strategies
-            regional_strategies = self._analyze_regional_strategies(
-                data, competitor_column, price_column, region_column
+            # Market average over all priced rows, recovered from the
+            # per-competitor means and counts
+            price_count = stats.pop('price_count')
+            market_avg = (stats['avg_price'] * price_count).sum() / price_count.sum()
+            
+            region_comp_mean = regional_prices.pivot(
+                index=region_column, columns=competitor_column, values=price_column
             )
             
-            return {
-                'competitor_statistics': competitor_stats,
-                'price_leaders': price_leaders,
-                'price_positioning': price_positioning,
-                'regional_strategies': regional_strategies,
-                'total_competitors': len(data[competitor_column].unique()),
-                'total_regions': len(data[region_column].unique())
-            }
+            return self._summarize_competitor_pricing(stats, region_comp_mean, market_avg)
         
         except Exception as e:
             logger.error(f"Error analyzing competitor pricing: {str(e)}")
             raise
     
-    def _calculate_competitor_stats(self, data: pd.DataFrame,
-                                    competitor_column: str,
-                                    price_column: str,
-                                    region_column: str) -> List[Dict[str, Any]]:
-        """Calculate statistics for each competitor."""
-        stats_list = []
+    def _summarize_competitor_pricing(self, stats: pd.DataFrame,
+                                      region_comp_mean: pd.DataFrame,
+                                      market_avg: float) -> Dict[str, Any]:
+        """Build the pricing analysis from per-competitor and per-region prices."""
+        comp_price_mean = stats['avg_price']
         
-        for competitor in data[competitor_column].unique():
-            comp_data = data[data[competitor_column] == competitor]
-            prices = comp_data[price_column].dropna()
-            
-            if len(prices) == 0:
-                continue
-            
-            stats_list.append({
-                'competitor': competitor,
-                'avg_price': float(prices.mean()),
-                'median_price': float(prices.median()),
-                'min_price': float(prices.min()),
-                'max_price': float(prices.max()),
-                'price_std': float(prices.std()),
-                'regions_present': int(comp_data[region_column].nunique()),
-                'total_products': int(len(comp_data))
-            })
+        # Calculate competitor statistics
+        competitor_stats = self._calculate_competitor_stats(stats)
         
-        # Sort by average price
-        stats_list.sort(key=lambda x: x['avg_price'])
+        # Identify price leaders
+        price_leaders = self._identify_price_leaders(
+            comp_price_mean, region_comp_mean
+        )
         
-        return stats_list
-    
-    def _identify_price_leaders(self, data: pd.DataFrame,
-                               competitor_column: str,
-                               price_column: str,
-                               region_column: str) -> Dict[str, Any]:
-        """Identify price leaders (lowest and highest) by region."""
-        leaders = {
-            'by_region': [],
-            'overall': {}
+        # Calculate price positioning
+        price_positioning = self._calculate_price_positioning(
+            comp_price_mean, market_avg
+        )
+        
+        # Analyze regional strategies
+        regional_strategies = self._analyze_regional_strategies(region_comp_mean)
+        
+        return {
+            'competitor_statistics': competitor_stats,
+            'price_leaders': price_leaders,
+            'price_positioning': price_positioning,
+            'regional_strategies': regional_strategies,
+            'total_competitors': len(stats),
+            'total_regions': len(region_comp_mean.index)
         }
+    
+    def _competitor_stats_frame(self, comp_group: Any,
+                                price_column: str,
+                                region_column: str) -> pd.DataFrame:
+        """Aggregate price statistics for each competitor with pandas."""
+        price_stats = comp_group[price_column].agg(
+            avg_price='mean',
+            median_price='median',
+            min_price='min',
+            max_price='max',
+            price_std='std'
+        )
         
-        # Overall leaders
-        competitor_avg = data.groupby(competitor_column)[price_column].mean()
-        leaders['overall'] = {
+        return pd.concat([
+            price_stats,
+            comp_group[region_column].nunique().rename('regions_present'),
+            comp_group.size().rename('total_products')
+        ], axis=1)
+    
+    def _calculate_competitor_stats(self, stats: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Calculate statistics for each competitor."""
+        # Skip competitors without any price, sort by average price
+        stats = stats.dropna(subset=['avg_price']).sort_values('avg_price', kind='stable')
+        stats.index.name = 'competitor'
+        
+        return stats.reset_index().to_dict(orient='records')
+    
+    def _identify_price_leaders(self, comp_price_mean: pd.Series,
+                               region_comp_mean: pd.DataFrame) -> Dict[str, Any]:
+        """Identify price leaders (lowest and highest) by region."""
+        # Overall leaders (ties resolve to the first competitor by name)
+        competitor_avg = comp_price_mean.sort_index()
+        overall = {
             'lowest_price_competitor': competitor_avg.idxmin(),
             'lowest_avg_price': float(competitor_avg.min()),
             'highest_price_competitor': competitor_avg.idxmax(),
             'highest_avg_price': float(competitor_avg.max())
         }
         
-        # Regional leaders
-        for region in data[region_column].unique():
-            region_data = data[data[region_column] == region]
-            region_avg = region_data.groupby(competitor_column)[price_column].mean()
-            
-            if len(region_avg) == 0:
-                continue
-            
-            leaders['by_region'].append({
-                'region': region,
-                'lowest_price_competitor': region_avg.idxmin(),
-                'lowest_avg_price': float(region_avg.min()),
-                'highest_price_competitor': region_avg.idxmax(),
-                'highest_avg_price': float(region_avg.max()),
-                'price_spread': float(region_avg.max() - region_avg.min())
-            })
+        # Regional leaders: one reduction along the competitor axis of the
+        # region x competitor table gives every region's extremes at once
+        region_avg = region_comp_mean.sort_index(axis=1).dropna(how='all')
+        lowest = region_avg.min(axis=1).to_numpy(dtype=np.float64)
+        highest = region_avg.max(axis=1).to_numpy(dtype=np.float64)
+        by_region = pd.DataFrame({
+            'region': region_avg.index,
+            'lowest_price_competitor': region_avg.idxmin(axis=1).to_numpy(),
+            'lowest_avg_price': lowest,
+            'highest_price_competitor': region_avg.idxmax(axis=1).to_numpy(),
+            'highest_avg_price': highest,
+            'price_spread': highest - lowest
+        })
         
-        return leaders
+        return {
+            'by_region': by_region.to_dict(orient='records'),
+            'overall': overall
+        }
     
-    def _calculate_price_positioning(self, data: pd.DataFrame,
-                                    competitor_column: str,
-                                    price_column: str) -> List[Dict[str, Any]]:
+    def _calculate_price_positioning(self, comp_price_mean: pd.Series,
+                                    market_avg: float) -> List[Dict[str, Any]]:
         """Calculate price positioning relative to market average."""
-        market_avg = data[price_column].mean()
+        comp_avg = comp_price_mean.dropna()
         
-        positioning = []
-        for competitor in data[competitor_column].unique():
-            comp_prices = data[data[competitor_column] == competitor][price_column]
-            comp_avg = comp_prices.mean()
-            
-            # Calculate positioning
-            diff_from_market = comp_avg - market_avg
-            diff_pct = (diff_from_market / market_avg * 100) if market_avg > 0 else 0
-            
-            # Categorize positioning
-            if diff_pct < -10:
-                position = 'Budget'
-            elif diff_pct < -5:
-                position = 'Value'
-            elif diff_pct < 5:
-                position = 'Market'
-            elif diff_pct < 10:
-                position = 'Premium'
-            else:
-                position = 'Luxury'
-            
-            positioning.append({
-                'competitor': competitor,
-                'avg_price': float(comp_avg),
-                'market_avg_price': float(market_avg),
-                'difference_from_market': float(diff_from_market),
-                'difference_pct': float(diff_pct),
-                'positioning': position
-            })
+        # Calculate positioning
+        diff_from_market = comp_avg - market_avg
+        if market_avg > 0:
+            diff_pct = diff_from_market / market_avg * 100
+        else:
+            diff_pct = pd.Series(0.0, index=comp_avg.index)
+        
+        # Categorize positioning
+        position = pd.cut(
+            diff_pct,
+            bins=[-np.inf, -10, -5, 5, 10, np.inf],
+            labels=['Budget', 'Value', 'Market', 'Premium', 'Luxury'],
+            right=False
+        )
+        
+        positioning = pd.DataFrame({
+            'competitor': comp_avg.index,
+            'avg_price': comp_avg.to_numpy(dtype=np.float64),
+            'market_avg_price': float(market_avg),
+            'difference_from_market': diff_from_market.to_numpy(dtype=np.float64),
+            'difference_pct': diff_pct.to_numpy(dtype=np.float64),
+            'positioning': position.astype(str).to_numpy()
+        })
         
         # Sort by price
-        positioning.sort(key=lambda x: x['avg_price'])
+        positioning = positioning.sort_values('avg_price', kind='stable')
         
-        return positioning
+        return positioning.to_dict(orient='records')
     
-    def _analyze_regional_strategies(self, data: pd.DataFrame,
-                                    competitor_column: str,
-                                    price_column: str,
-                                    region_column: str) -> List[Dict[str, Any]]:
+    def _analyze_regional_strategies(self, region_comp_mean: pd.DataFrame) -> List[Dict[str, Any]]:
         """Analyze pricing strategies across regions for each competitor."""
-        strategies = []
+        # Columns are competitors, rows are their mean price per region
+        regions_count = region_comp_mean.count()
+        regional_prices = region_comp_mean.loc[:, regions_count >= 2]
         
-        for competitor in data[competitor_column].unique():
-            comp_data = data[data[competitor_column] == competitor]
-            
-            # Calculate regional prices
-            regional_prices = comp_data.groupby(region_column)[price_column].mean()
-            
-            if len(regional_prices) < 2:
-                continue
-            
-            # Calculate price variation
-            price_cv = regional_prices.std() / regional_prices.mean() if regional_prices.mean() > 0 else 0
-            
-            # Determine strategy
-            if price_cv < 0.05:
-                strategy = 'Uniform Pricing'
-            elif price_cv < 0.15:
-                strategy = 'Moderate Variation'
-            else:
-                strategy = 'Regional Pricing'
-            
-            strategies.append({
-                'competitor': competitor,
-                'regions_count': int(len(regional_prices)),
-                'avg_price': float(regional_prices.mean()),
-                'price_std': float(regional_prices.std()),
-                'coefficient_of_variation': float(price_cv),
-                'min_regional_price': float(regional_prices.min()),
-                'max_regional_price': float(regional_prices.max()),
-                'pricing_strategy': strategy
-            })
+        avg_price = regional_prices.mean().to_numpy(dtype=np.float64)
+        price_std = regional_prices.std().to_numpy(dtype=np.float64)
+        
+        # Calculate price variation
+        price_cv = np.zeros_like(avg_price)
+        np.divide(price_std, avg_price, out=price_cv, where=avg_price > 0)
         
-        return strategies
+        strategies = pd.DataFrame({
+            'competitor': regional_prices.columns,
+            'regions_count': regions_count[regional_prices.columns].to_numpy(dtype=np.int64),
+            'avg_price': avg_price,
+            'price_std': price_std,
+            'coefficient_of_variation': price_cv,
+            'min_regional_price': regional_prices.min().to_numpy(dtype=np.float64),
+            'max_regional_price': regional_prices.max().to_numpy(dtype=np.float64),
+            'pricing_strategy': _CV_LABELS[np.searchsorted(_CV_BINS, price_cv, side='right')]
+        })
+        
+        return strategies.to_dict(orient='records')
     
     def analyze_market_share(self, data: pd.DataFrame,
                             competitor_column: str = 'competitor',
@@ -239,77 +430,134 @@ class CompetitorAnalyzer:
             Dictionary with market share analysis
         """
         try:
-            # Overall market share
-            total_sales = data[sales_column].sum()
-            overall_share = data.groupby(competitor_column)[sales_column].sum() / total_sales * 100
-            
-            overall_market_share = []
-            for competitor, share in overall_share.items():
-                overall_market_share.append({
-                    'competitor': competitor,
-                    'market_share_pct': float(share),
-                    'total_sales': float(data[data[competitor_column] == competitor][sales_column].sum())
-                })
-            
-            # Sort by market share
-            overall_market_share.sort(key=lambda x: x['market_share_pct'], reverse=True)
+            data = _prepare_frame(data, [competitor_column, region_column], [sales_column])
             
-            # Regional market share
-            regional_market_share = []
-            for region in data[region_column].unique():
-                region_data = data[data[region_column] == region]
-                region_total = region_data[sales_column].sum()
-                
-                if region_total == 0:
-                    continue
-                
-                region_shares = []
-                for competitor in region_data[competitor_column].unique():
-                    comp_sales = region_data[region_data[competitor_column] == competitor][sales_column].sum()
-                    share_pct = (comp_sales / region_total * 100) if region_total > 0 else 0
-                    
-                    region_shares.append({
-                        'competitor': competitor,
-                        'market_share_pct': float(share_pct),
-                        'sales': float(comp_sales)
-                    })
-                
-                # Sort by share
-                region_shares.sort(key=lambda x: x['market_share_pct'], reverse=True)
-                
-                regional_market_share.append({
-                    'region': region,
-                    'total_sales': float(region_total),
-                    'market_leader': region_shares[0]['competitor'] if region_shares else None,
-                    'leader_share_pct': region_shares[0]['market_share_pct'] if region_shares else 0,
-                    'competitors': region_shares
-                })
+            # Sales per region x competitor; NaN marks a competitor absent
+            # from a region. Unsorted groups come out in order of first
+            # appearance, which ranks tied competitors within a region
+            sums = data.groupby(
+                [region_column, competitor_column], sort=False, observed=True
+            )[sales_column].sum()
+            piv = sums.unstack()
+            first_seen = pd.Series(np.arange(len(sums)), index=sums.index).unstack()
             
-            # Calculate concentration (HHI - Herfindahl-Hirschman Index)
-            hhi = sum(share['market_share_pct'] ** 2 for share in overall_market_share)
-            
-            # Interpret concentration
-            if hhi < 1500:
-                concentration = 'Low (Competitive)'
-            elif hhi < 2500:
-                concentration = 'Moderate'
-            else:
-                concentration = 'High (Concentrated)'
+            return self._summarize_market_share(piv, first_seen)
+        
+        except Exception as e:
+            logger.error(f"Error analyzing market share: {str(e)}")
+            raise
+    
+    def analyze_market_share_totals(self, regional_sales: pd.DataFrame,
+                                    competitor_column: str = 'competitor',
+                                    sales_column: str = 'sales',
+                                    region_column: str = 'region') -> Dict[str, Any]:
+        """
+        Analyze market share from pre-aggregated sales totals.
+        
+        Takes the output of AthenaClient.get_market_share, so only the
+        shares, ranking and HHI are computed here.
+        
+        Args:
+            regional_sales: One row per region x competitor with total sales
+            competitor_column: Name of competitor column
+            sales_column: Name of sales column
+            region_column: Name of region column
+        
+        Returns:
+            Dictionary with market share analysis
+        """
+        try:
+            piv = regional_sales.pivot(
+                index=region_column, columns=competitor_column, values=sales_column
+            )
+            # Row order ranks tied competitors within a region
+            first_seen = regional_sales.assign(
+                _first_seen=np.arange(len(regional_sales))
+            ).pivot(index=region_column, columns=competitor_column, values='_first_seen')
             
-            return {
-                'overall_market_share': overall_market_share,
-                'regional_market_share': regional_market_share,
-                'market_concentration': {
-                    'hhi': float(hhi),
-                    'interpretation': concentration
-                },
-                'total_competitors': len(overall_market_share)
-            }
+            return self._summarize_market_share(piv, first_seen)
         
         except Exception as e:
             logger.error(f"Error analyzing market share: {str(e)}")
             raise
     
+    def _summarize_market_share(self, piv: pd.DataFrame,
+                                first_seen: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Build the market share analysis from region x competitor sales.
+        
+        Args:
+            piv: Sales per region (rows) x competitor (columns), NaN where
+                a competitor is absent from a region
+            first_seen: Same shape as piv; rank of each pair's first
+                appearance in the input, used to order tied shares
+        
+        Returns:
+            Dictionary with market share analysis
+        """
+        # Overall market share
+        overall = piv.sum(axis=0)
+        total_sales = overall.sum()
+        overall_frame = pd.DataFrame({
+            'competitor': overall.index,
+            'market_share_pct': (overall / total_sales * 100).to_numpy(dtype=np.float64),
+            'total_sales': overall.to_numpy(dtype=np.float64)
+        }).sort_values(['market_share_pct', 'competitor'], ascending=[False, True])
+        overall_market_share = overall_frame.to_dict(orient='records')
+        
+        # Regional market share, skipping regions without sales
+        region_totals = piv.sum(axis=1)
+        has_sales = region_totals.to_numpy() != 0
+        piv = piv[has_sales]
+        region_totals = region_totals[has_sales]
+        sales = piv.to_numpy(dtype=np.float64)
+        first_seen = first_seen.reindex(index=piv.index, columns=piv.columns).to_numpy(dtype=np.float64)
+        shares = sales / region_totals.to_numpy(dtype=np.float64)[:, None] * 100
+        
+        # One row per competitor present in a region, ordered by region,
+        # then by descending share, then by first appearance
+        region_pos, comp_pos = np.nonzero(~np.isnan(sales))
+        share_values = shares[region_pos, comp_pos]
+        order = np.lexsort((first_seen[region_pos, comp_pos], -share_values, region_pos))
+        region_pos, comp_pos = region_pos[order], comp_pos[order]
+        region_shares = pd.DataFrame({
+            'competitor': piv.columns[comp_pos],
+            'market_share_pct': share_values[order],
+            'sales': sales[region_pos, comp_pos]
+        }).to_dict(orient='records')
+        
+        bounds = np.cumsum(np.bincount(region_pos, minlength=len(piv.index)))
+        regional_market_share = []
+        for region, region_total, start, end in zip(
+            piv.index, region_totals.to_numpy(dtype=np.float64).tolist(),
+            np.concatenate(([0], bounds[:-1])).tolist(), bounds.tolist()
+        ):
+            competitors = region_shares[start:end]
+            regional_market_share.append({
+                'region': region,
+                'total_sales': region_total,
+                'market_leader': competitors[0]['competitor'] if competitors else None,
+                'leader_share_pct': competitors[0]['market_share_pct'] if competitors else 0,
+                'competitors': competitors
+            })
+        
+        # Calculate concentration (HHI - Herfindahl-Hirschman Index)
+        shares = overall_frame['market_share_pct'].to_numpy()
+        hhi = float(shares @ shares)
+        
+        # Interpret concentration
+        concentration = str(_HHI_LABELS[np.searchsorted(_HHI_BINS, hhi, side='right')])
+        
+        return {
+            'overall_market_share': overall_market_share,
+            'regional_market_share': regional_market_share,
+            'market_concentration': {
+                'hhi': hhi,
+                'interpretation': concentration
+            },
+            'total_competitors': len(overall_market_share)
+        }
+    
     def identify_competitive_advantages(self, data: pd.DataFrame,
                                        competitor_column: str = 'competitor',
                                        metrics: Dict[str, str] = None) -> List[Dict[str, Any]]:
@@ -332,42 +580,57 @@ class CompetitorAnalyzer:
                     'availability': 'availability_score'
                 }
             
-            advantages = []
+            # Metrics whose columns are present, with their mean per
+            # competitor and across the market
+            metrics = {name: col for name, col in metrics.items() if col in data.columns}
+            data = _prepare_frame(data, [competitor_column], list(metrics.values()))
+            cols = list(dict.fromkeys(metrics.values()))
+            comp_means = data.groupby(competitor_column, sort=False, observed=True)[cols].mean()
+            market_means = data[cols].mean()
+            
+            comp_values = pd.DataFrame(
+                {name: comp_means[col] for name, col in metrics.items()},
+                index=comp_means.index
+            )
+            market_values = pd.Series({name: market_means[col] for name, col in metrics.items()})
+            diff_pct = (comp_values - market_values) / market_values * 100
+            
+            # For price, lower is better; for other metrics, higher is better
+            flags = pd.DataFrame(
+                {
+                    name: (comp_values[name] < market_values[name] * 0.95)
+                    if name == 'price'
+                    else (comp_values[name] > market_values[name] * 1.05)
+                    for name in metrics
+                },
+                index=comp_means.index
+            )
+            
+            advantages_by_competitor = {
+                competitor: {'competitor': competitor, 'advantages': []}
+                for competitor in comp_means.index
+            }
+            
+            # One record per (competitor, metric) lead, in competitor order
+            comp_pos, metric_pos = np.nonzero(flags.to_numpy(dtype=bool))
+            metric_names = np.asarray(list(metrics), dtype=object)[metric_pos]
+            labels = {
+                name: 'Price Leader' if name == 'price' else f'{name.title()} Leader'
+                for name in metrics
+            }
+            records = pd.DataFrame({
+                'metric': metric_names,
+                'advantage': [labels[name] for name in metric_names],
+                'value': comp_values.to_numpy(dtype=np.float64)[comp_pos, metric_pos],
+                'market_avg': market_values.to_numpy(dtype=np.float64)[metric_pos],
+                'difference_pct': diff_pct.to_numpy(dtype=np.float64)[comp_pos, metric_pos]
+            }).to_dict(orient='records')
+            
+            competitors = list(advantages_by_competitor.values())
+            for pos, record in zip(comp_pos.tolist(), records):
+                competitors[pos]['advantages'].append(record)
             
-            for competitor in data[competitor_column].unique():
-                comp_data = data[data[competitor_column] == competitor]
-                comp_advantages = {'competitor': competitor, 'advantages': []}
-                
-                for metric_name, column_name in metrics.items():
-                    if column_name not in data.columns:
-                        continue
-                    
-                    # Calculate competitor's position
-                    comp_value = comp_data[column_name].mean()
-                    market_value = data[column_name].mean()
-                    
-                    # For price, lower is better
-                    if metric_name == 'price':
-                        if comp_value < market_value * 0.95:
-                            comp_advantages['advantages'].append({
-                                'metric': metric_name,
-                                'advantage': 'Price Leader',
-                                'value': float(comp_value),
-                                'market_avg': float(market_value),
-                                'difference_pct': float((comp_value - market_value) / market_value * 100)
-                            })
-                    else:
-                        # For other metrics, higher is better
-                        if comp_value > market_value * 1.05:
-                            comp_advantages['advantages'].append({
-                                'metric': metric_name,
-                                'advantage': f'{metric_name.title()} Leader',
-                                'value': float(comp_value),
-                                'market_avg': float(market_value),
-                                'difference_pct': float((comp_value - market_value) / market_value * 100)
-                            })
-                
-                advantages.append(comp_advantages)
+            advantages = list(advantages_by_competitor.values())
             
             return advantages
         
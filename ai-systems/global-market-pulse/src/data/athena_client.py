@@ -5,20 +5,86 @@ Provides data access methods for market analysis queries.
 """
 
 import boto3
+import hashlib
+import json
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import os
+import threading
 import time
 import logging
-from typing import Optional, List, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+# In-process result cache: entries expire after QUERY_CACHE_TTL seconds and
+# the least recently used entry is evicted beyond QUERY_CACHE_SIZE. The cache
+# lives on the client, so a warm Lambda container answers repeated endpoint
+# calls with the same parameters without another Athena round-trip
+QUERY_CACHE_SIZE = int(os.getenv('ATHENA_CACHE_SIZE', '128'))
+QUERY_CACHE_TTL = float(os.getenv('ATHENA_CACHE_TTL', '300'))
+
+_INTEGER_TYPES = {'tinyint', 'smallint', 'integer', 'bigint'}
+_FLOAT_TYPES = {'float', 'real', 'double', 'decimal'}
+_DATETIME_TYPES = {'date', 'timestamp'}
+
+# Athena column types -> Arrow types used when parsing the CSV result file
+_ARROW_TYPES = {
+    'boolean': pa.bool_(),
+    'tinyint': pa.int8(),
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'float': pa.float32(),
+    'real': pa.float32(),
+    'double': pa.float64(),
+    'decimal': pa.float64(),
+    'date': pa.date32(),
+    'timestamp': pa.timestamp('ms'),
+}
+
+
+def _sql_literal(value: Any) -> str:
+    """Render a value as an Athena execution-parameter literal."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _to_column(values: List[Optional[str]], athena_type: str) -> Any:
+    """
+    Convert Athena VarCharValue strings to a typed column.
+    
+    Integers become int64, or float64 when the column has NULLs, matching
+    Arrow's default conversion; other types map to float64, bool and
+    datetime64[ns]. Unknown types stay as strings.
+    """
+    athena_type = athena_type.split('(')[0].lower()
+    
+    if athena_type in _INTEGER_TYPES:
+        if None in values:
+            return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+        return np.array(values, dtype=np.int64)
+    if athena_type in _FLOAT_TYPES:
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    if athena_type == 'boolean':
+        return pd.array([None if v is None else v == 'true' for v in values], dtype='boolean')
+    if athena_type in _DATETIME_TYPES:
+        return pd.to_datetime(pd.Series(values, dtype=object))
+    return values
+
 
 class AthenaClient:
     """
     Client for querying data from AWS Athena.
     """
     
-    def __init__(self, database: str = None, output_location: str = None, region: str = None, workgroup: str = None):
+    def __init__(self, database: str = None, output_location: str = None, region: str = None, workgroup: str = None,
+                 dtype_backend: str = None):
         """
         Initialize Athena client.
         
@@ -27,13 +93,14 @@ class AthenaClient:
             output_location: S3 location for query results
             region: AWS region
             workgroup: Athena workgroup name
+            dtype_backend: 'pyarrow' to return Arrow-backed DataFrames,
+                otherwise NumPy-backed columns
         """
-        import os
-        
         # Get from environment variables with fallbacks
         self.database = database or os.getenv('ATHENA_DATABASE', 'global_market_pulse')
         self.region = region or os.getenv('AWS_REGION', 'us-east-2')
         self.workgroup = 'primary'  # Always use primary workgroup for MVP
+        self.dtype_backend = dtype_backend or os.getenv('ATHENA_DTYPE_BACKEND', 'numpy')
         
         # Set output location from environment or use default
         if output_location is None:
@@ -46,34 +113,84 @@ class AthenaClient:
         
         self.client = boto3.client('athena', region_name=self.region)
         self.s3_client = boto3.client('s3', region_name=self.region)
+        
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _cache_key(self, query: str, params: Optional[List[str]] = None) -> str:
+        """Key a query by database, SQL text and execution parameters."""
+        text = '\x00'.join([self.database, query] + list(params or []))
+        return hashlib.blake2b(text.encode()).hexdigest()
     
-    def execute_query(self, query: str, max_wait_time: int = 60) -> pd.DataFrame:
+    def _cache_get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return a cached, unexpired result and mark it most recently used."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, df = entry
+            if time.monotonic() - stored_at > QUERY_CACHE_TTL:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return df
+    
+    def _cache_put(self, key: str, df: pd.DataFrame) -> None:
+        """Store a result, evicting the least recently used entries."""
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), df)
+            self._cache.move_to_end(key)
+            while len(self._cache) > QUERY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    def invalidate(self) -> None:
+        """Drop all cached query results."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def execute_query(self, query: str, params: Optional[List[Any]] = None,
+                      max_wait_time: int = 60, cache: bool = True) -> pd.DataFrame:
         """
         Execute Athena query and return results as DataFrame.
         
         Args:
-            query: SQL query string
+            query: SQL query string, with ? placeholders for params
+            params: Values bound to the ? placeholders, in order
             max_wait_time: Maximum time to wait for query completion (seconds)
+            cache: Serve and store the result in the in-process query cache;
+                pass False to force a fresh query
         
         Returns:
             DataFrame with query results
         """
         try:
+            params = [_sql_literal(value) for value in params] if params else None
+            key = self._cache_key(query, params)
+            if cache:
+                cached = self._cache_get(key)
+                if cached is not None:
+                    logger.info("Query served from cache")
+                    return cached.copy(deep=False)
+            
             # Start query execution
-            response = self.client.start_query_execution(
-                QueryString=query,
-                QueryExecutionContext={'Database': self.database},
-                ResultConfiguration={'OutputLocation': self.output_location},
-                WorkGroup=self.workgroup
-            )
+            request = {
+                'QueryString': query,
+                'QueryExecutionContext': {'Database': self.database},
+                'ResultConfiguration': {'OutputLocation': self.output_location},
+                'WorkGroup': self.workgroup
+            }
+            if params:
+                request['ExecutionParameters'] = params
+            response = self.client.start_query_execution(**request)
             
             query_execution_id = response['QueryExecutionId']
             logger.info(f"Started query execution: {query_execution_id}")
             
-            # Wait for query to complete
-            start_time = time.time()
+            # Wait for query to complete, backing off from 50 ms to 2 s
+            start_time = time.monotonic()
+            delay = 0.05
             while True:
-                if time.time() - start_time > max_wait_time:
+                if time.monotonic() - start_time > max_wait_time:
                     raise TimeoutError(f"Query execution exceeded {max_wait_time} seconds")
                 
                 status = self.client.get_query_execution(QueryExecutionId=query_execution_id)
@@ -85,37 +202,124 @@ class AthenaClient:
                     reason = status['QueryExecution']['Status'].get('StateChangeReason', 'Unknown')
                     raise Exception(f"Query {state}: {reason}")
                 
-                time.sleep(1)
-            
-            # Get query results
-            result = self.client.get_query_results(QueryExecutionId=query_execution_id)
+                time.sleep(delay)
+                delay = min(delay * 1.5, 2.0)
             
-            # Parse results into DataFrame
-            df = self._parse_query_results(result)
+            # Read the result file Athena wrote to S3; statements without a
+            # CSV result (DDL etc.) fall back to paging get_query_results
+            result_location = status['QueryExecution']['ResultConfiguration']['OutputLocation']
+            if result_location.endswith('.csv'):
+                column_info = self.client.get_query_results(
+                    QueryExecutionId=query_execution_id, MaxResults=1
+                )['ResultSet']['ResultSetMetadata']['ColumnInfo']
+                df = self._read_result_csv(result_location, column_info)
+            else:
+                df = self._parse_query_results(query_execution_id)
             
             logger.info(f"Query returned {len(df)} rows")
+            
+            if cache:
+                self._cache_put(key, df)
+                return df.copy(deep=False)
             return df
         
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             raise
     
-    def _parse_query_results(self, result: Dict) -> pd.DataFrame:
-        """Parse Athena query results into DataFrame."""
-        rows = result['ResultSet']['Rows']
+    def execute_queries(self, queries: Dict[str, Union[str, Tuple[str, List[Any]]]],
+                        max_workers: int = 8, **kwargs) -> Dict[str, pd.DataFrame]:
+        """
+        Execute independent Athena queries concurrently.
         
-        if len(rows) == 0:
-            return pd.DataFrame()
+        Each query spends nearly all of its time waiting on Athena, so
+        running them on a thread pool overlaps the waits.
         
-        # Extract column names from first row
-        columns = [col['VarCharValue'] for col in rows[0]['Data']]
+        Args:
+            queries: Name -> SQL string, or name -> (SQL, params) tuple
+            max_workers: Maximum number of queries in flight at once
+            **kwargs: Passed through to execute_query
         
-        # Extract data rows
-        data = []
-        for row in rows[1:]:
-            data.append([col.get('VarCharValue', None) for col in row['Data']])
+        Returns:
+            Name -> DataFrame with that query's results
+        """
+        if not queries:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+            futures = {}
+            for name, query in queries.items():
+                query, params = (query, None) if isinstance(query, str) else query
+                futures[name] = executor.submit(self.execute_query, query, params, **kwargs)
+            return {name: future.result() for name, future in futures.items()}
+    
+    def _read_result_csv(self, result_location: str, column_info: List[Dict]) -> pd.DataFrame:
+        """
+        Parse an Athena CSV result file into a typed DataFrame via Arrow.
+        
+        Args:
+            result_location: s3:// URI of the query's result CSV
+            column_info: ColumnInfo list from the query's result metadata
+        
+        Returns:
+            DataFrame with numeric, date and timestamp columns already typed
+        """
+        bucket, key = result_location[len('s3://'):].split('/', 1)
+        body = self.s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+        
+        columns = [col['Label'] for col in column_info]
+        column_types = {
+            col['Label']: _ARROW_TYPES.get(col['Type'].lower(), pa.string())
+            for col in column_info
+        }
+        
+        # Athena quotes every value and leaves NULLs as bare empty fields
+        table = pa_csv.read_csv(
+            pa.BufferReader(body),
+            read_options=pa_csv.ReadOptions(column_names=columns, skip_rows=1),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False
+            )
+        )
+        
+        if self.dtype_backend == 'pyarrow':
+            return table.to_pandas(use_threads=True, types_mapper=pd.ArrowDtype)
+        return table.to_pandas(use_threads=True, date_as_object=False)
+    
+    def _parse_query_results(self, query_execution_id: str) -> pd.DataFrame:
+        """Read every page of query results into a typed DataFrame."""
+        paginator = self.client.get_paginator('get_query_results')
+        
+        column_info = None
+        columns = None
+        for page in paginator.paginate(QueryExecutionId=query_execution_id):
+            rows = page['ResultSet']['Rows']
+            
+            if column_info is None:
+                column_info = [
+                    (col['Name'], col['Type'])
+                    for col in page['ResultSet']['ResultSetMetadata']['ColumnInfo']
+                ]
+                columns = [[] for _ in column_info]
+                # The first row of the first page is the header
+                rows = rows[1:]
+            
+            for row in rows:
+                for values, cell in zip(columns, row['Data']):
+                    values.append(cell.get('VarCharValue'))
         
-        return pd.DataFrame(data, columns=columns)
+        if not column_info:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame({
+            name: _to_column(values, athena_type)
+            for (name, athena_type), values in zip(column_info, columns)
+        })
+        if self.dtype_backend == 'pyarrow':
+            return df.convert_dtypes(dtype_backend='pyarrow')
+        return df
     
     def get_market_trends(self, region: Optional[str] = None, days: int = 90) -> pd.DataFrame:
         """
@@ -137,18 +341,20 @@ class AthenaClient:
             AVG(total_amount) as avg_order_value,
             COUNT(DISTINCT customer_id) as unique_customers
         FROM orders
-        WHERE order_date >= DATE_ADD('day', -{days}, CURRENT_DATE)
+        WHERE order_date >= DATE_ADD('day', -?, CURRENT_DATE)
         """
+        params = [int(days)]
         
         if region:
-            query += f" AND region = '{region}'"
+            query += " AND region = ?"
+            params.append(region)
         
         query += """
         GROUP BY DATE(order_date)""" + (", region" if region else "") + """
         ORDER BY date
         """
         
-        return self.execute_query(query)
+        return self.execute_query(query, params)
     
     def get_regional_prices(self, product_ids: Optional[List[str]] = None, limit: int = 1000) -> pd.DataFrame:
         """
@@ -177,29 +383,34 @@ class AthenaClient:
         WHERE o.order_date >= DATE_ADD('day', -90, CURRENT_DATE)
         """
         
-        if product_ids:
-            product_list = "', '".join(product_ids)
-            query += f" AND p.product_id IN ('{product_list}')"
-        
-        query += f"""
+        group_by = f"""
         GROUP BY p.product_id, p.name, p.category_id, p.price, o.shipping_country
-        LIMIT {limit}
+        LIMIT {int(limit)}
         """
         
-        return self.execute_query(query)
-    
-    def get_competitor_data(self, region: Optional[str] = None, limit: int = 500) -> pd.DataFrame:
-        """
-        Get competitor data (simulated from product categories).
-        
-        Args:
-            region: Optional region filter
-            limit: Maximum number of records
+        params = []
+        if product_ids:
+            # Sorted and de-duplicated so requests naming the same products in
+            # any order share one cache entry
+            ids = sorted({str(pid) for pid in product_ids})
+            
+            # An unfiltered result that came back under the limit holds every
+            # product, so a cached one answers the filtered query locally
+            cached = self._cache_get(self._cache_key(query + group_by))
+            if cached is not None and len(cached) < int(limit):
+                logger.info("Regional prices filtered from cached unfiltered result")
+                mask = np.isin(cached['product_id'].astype(str).to_numpy(), ids)
+                return cached[mask].reset_index(drop=True)
+            
+            # One JSON-array parameter instead of splicing ids into the SQL
+            query += " AND p.product_id IN (SELECT id FROM UNNEST(CAST(json_parse(?) AS ARRAY(VARCHAR))) AS t(id))"
+            params.append(json.dumps(ids))
         
-        Returns:
-            DataFrame with competitor data
-        """
-        query = f"""
+        return self.execute_query(query + group_by, params)
+    
+    def _competitor_rows_query(self, region: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """Build the competitor x product x region sales query and its params."""
+        query = """
         SELECT 
             c.name as competitor,
             p.product_id,
@@ -215,15 +426,92 @@ class AthenaClient:
         WHERE o.order_date >= DATE_ADD('day', -90, CURRENT_DATE)
         """
         
+        params = []
         if region:
-            query += f" AND o.shipping_country = '{region}'"
+            query += " AND o.shipping_country = ?"
+            params.append(region)
         
-        query += f"""
+        query += """
         GROUP BY c.name, p.product_id, p.name, p.price, o.shipping_country
-        LIMIT {limit}
         """
         
-        return self.execute_query(query)
+        return query, params
+    
+    def get_competitor_data(self, region: Optional[str] = None, limit: int = 500) -> pd.DataFrame:
+        """
+        Get competitor data (simulated from product categories).
+        
+        Args:
+            region: Optional region filter
+            limit: Maximum number of records
+        
+        Returns:
+            DataFrame with competitor data
+        """
+        query, params = self._competitor_rows_query(region)
+        query += f"LIMIT {int(limit)}\n"
+        
+        return self.execute_query(query, params)
+    
+    def get_competitor_statistics(self, region: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get per-competitor price statistics aggregated in Athena.
+        
+        Statistics are over the same competitor x product x region rows as
+        get_competitor_data; the median is approximate.
+        
+        Args:
+            region: Optional region filter
+        
+        Returns:
+            DataFrame with one row per competitor
+        """
+        rows, params = self._competitor_rows_query(region)
+        query = f"""
+        WITH competitor_rows AS ({rows})
+        SELECT 
+            competitor,
+            AVG(price) as avg_price,
+            APPROX_PERCENTILE(price, 0.5) as median_price,
+            MIN(price) as min_price,
+            MAX(price) as max_price,
+            STDDEV_SAMP(price) as price_std,
+            COUNT(DISTINCT region) as regions_present,
+            COUNT(*) as total_products,
+            COUNT(price) as price_count
+        FROM competitor_rows
+        GROUP BY competitor
+        ORDER BY competitor
+        """
+        
+        return self.execute_query(query, params)
+    
+    def get_market_share(self, region: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get sales totals and mean price per region and competitor,
+        aggregated in Athena.
+        
+        Args:
+            region: Optional region filter
+        
+        Returns:
+            DataFrame with one row per region x competitor
+        """
+        rows, params = self._competitor_rows_query(region)
+        query = f"""
+        WITH competitor_rows AS ({rows})
+        SELECT 
+            region,
+            competitor,
+            COALESCE(SUM(sales_revenue), 0) as sales,
+            AVG(price) as avg_price
+        FROM competitor_rows
+        WHERE region IS NOT NULL
+        GROUP BY region, competitor
+        ORDER BY region, competitor
+        """
+        
+        return self.execute_query(query, params)
     
     def get_market_opportunity_data(self, limit: int = 100) -> pd.DataFrame:
         """
@@ -251,7 +539,7 @@ class AthenaClient:
         GROUP BY o.shipping_country
         HAVING COUNT(DISTINCT o.order_id) > 10
         ORDER BY total_revenue DESC
-        LIMIT {limit}
+        LIMIT {int(limit)}
         """
         
         return self.execute_query(query)
@@ -266,14 +554,14 @@ class AthenaClient:
         Returns:
             DataFrame with regional growth rates
         """
-        query = f"""
+        query = """
         WITH monthly_sales AS (
             SELECT 
                 shipping_country as region,
                 DATE_TRUNC('month', order_date) as month,
                 SUM(total_amount) as monthly_revenue
             FROM orders
-            WHERE order_date >= DATE_ADD('day', -{days}, CURRENT_DATE)
+            WHERE order_date >= DATE_ADD('day', -?, CURRENT_DATE)
             GROUP BY shipping_country, DATE_TRUNC('month', order_date)
         ),
         growth_calc AS (
@@ -300,7 +588,7 @@ class AthenaClient:
         ORDER BY avg_growth_rate DESC
         """
         
-        return self.execute_query(query)
+        return self.execute_query(query, [int(days)])
     
     def get_external_market_data(self, limit: int = 100) -> pd.DataFrame:
         """
@@ -322,7 +610,7 @@ class AthenaClient:
         FROM orders
         WHERE order_date >= DATE_ADD('day', -365, CURRENT_DATE)
         GROUP BY shipping_country
-        LIMIT {limit}
+        LIMIT {int(limit)}
         """
         
         return self.execute_query(query)
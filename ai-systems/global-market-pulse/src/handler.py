@@ -4,30 +4,64 @@ AWS Lambda Handler for Global Market Pulse
 Provides REST API endpoints for global and regional market analysis.
 """
 
-import json
+import base64
+import gzip
+import importlib
 import logging
 import os
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+import numpy as np
+import orjson
 import pandas as pd
 
-from market.trend_analyzer import TrendAnalyzer
-from pricing.regional_comparator import RegionalComparator
-from opportunity.opportunity_scorer import OpportunityScorer
-from competitor.competitor_analyzer import CompetitorAnalyzer
-from data.athena_client import AthenaClient
+from opportunity.opportunity_scorer import top_n_positions
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize components
-athena_client = AthenaClient()
+# Header template; each response gets its own copy
+_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+    'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+}
+_GZIP_HEADERS = {**_HEADERS, 'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
 
-# Global instances (reused across invocations)
-trend_analyzer = TrendAnalyzer()
-regional_comparator = RegionalComparator()
-opportunity_scorer = OpportunityScorer()
-competitor_analyzer = CompetitorAnalyzer()
+# Bodies larger than this are gzip-compressed for clients that accept it
+GZIP_MIN_BYTES = 4096
+
+# Binary media type the API Gateway stage lists; a compressed response only
+# reaches the client intact if the request's Accept header names this type
+GZIP_MEDIA_TYPE = os.getenv('GZIP_MEDIA_TYPE', 'application/gzip')
+
+# Component name -> (module, class). Each is imported and constructed on
+# first use and then reused across invocations, so cold starts skip the
+# analyzers' heavy imports and routes only pay for what they touch
+_COMPONENT_CLASSES = {
+    'athena_client': ('data.athena_client', 'AthenaClient'),
+    'trend_analyzer': ('market.trend_analyzer', 'TrendAnalyzer'),
+    'regional_comparator': ('pricing.regional_comparator', 'RegionalComparator'),
+    'opportunity_scorer': ('opportunity.opportunity_scorer', 'OpportunityScorer'),
+    'competitor_analyzer': ('competitor.competitor_analyzer', 'CompetitorAnalyzer'),
+}
+_components: Dict[str, Any] = {}
+
+# Runs a route's independent Athena queries side by side; kept across warm
+# invocations. Threads are enough as botocore releases the GIL while waiting
+_query_executor = ThreadPoolExecutor(max_workers=2)
+
+
+def _get(name: str) -> Any:
+    """Return the shared component called name, creating it on first use."""
+    component = _components.get(name)
+    if component is None:
+        module_name, class_name = _COMPONENT_CLASSES[name]
+        component = getattr(importlib.import_module(module_name), class_name)()
+        _components[name] = component
+    return component
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -40,41 +74,28 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Parse request
         path = event.get('path', '')
         method = event.get('httpMethod', 'GET')
-        body = json.loads(event.get('body', '{}')) if event.get('body') else {}
-        query_params = event.get('queryStringParameters', {}) or {}
         
-        logger.info(f"Request: {method} {path}")
+        logger.info("Request: %s %s", method, path)
         
         # Route to appropriate handler
-        if path == '/global-market/trends' and method == 'GET':
-            return handle_market_trends(query_params)
-        
-        elif path == '/global-market/regional-prices' and method == 'GET':
-            return handle_regional_prices(query_params)
-        
-        elif path == '/global-market/price-comparison' and method == 'POST':
-            return handle_price_comparison(body)
-        
-        elif path == '/global-market/opportunities' and method == 'POST':
-            return handle_market_opportunities(body)
-        
-        elif path == '/global-market/competitor-analysis' and method == 'POST':
-            return handle_competitor_analysis(body)
-        
-        elif path == '/global-market/market-share' and method == 'GET':
-            return handle_market_share(query_params)
-        
-        elif path == '/global-market/growth-rates' and method == 'GET':
-            return handle_growth_rates(query_params)
-        
-        elif path == '/global-market/trend-changes' and method == 'POST':
-            return handle_trend_changes(body)
-        
+        route = _ROUTES.get((method, path))
+        if route is None:
+            return create_static_response('endpoint_not_found')
+        
+        route_handler, takes_body = route
+        if takes_body:
+            # Only POST routes read the body, so GETs skip decoding it
+            body = _decode_body(event)
+            response = route_handler(body)
         else:
-            return create_response(404, {'error': 'Endpoint not found'})
+            response = route_handler(event.get('queryStringParameters', {}) or {})
+        
+        if _accepts_gzip(event):
+            response = _compress_response(response)
+        return response
     
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}", exc_info=True)
+        logger.error("Error processing request: %s", e, exc_info=True)
         return create_response(500, {'error': str(e)})
 
 
@@ -100,47 +121,52 @@ def handle_market_trends(params: Dict) -> Dict:
         days = int(params.get('days', 90))
         
         # Fetch trend data
-        logger.info(f"Fetching market trends for region={region}, days={days}")
-        trend_data = athena_client.get_market_trends(region=region, days=days)
+        logger.info("Fetching market trends for region=%s, days=%s", region, days)
+        trend_data = _get('athena_client').get_market_trends(region=region, days=days)
         
         if trend_data.empty:
             logger.warning("No trend data found, returning empty trends")
-            return create_response(200, {'trends': []})
+            return create_static_response('no_trends')
         
         # Convert numeric columns
-        numeric_cols = ['order_count', 'total_sales', 'avg_order_value', 'unique_customers']
-        for col in numeric_cols:
-            if col in trend_data.columns:
-                trend_data[col] = pd.to_numeric(trend_data[col], errors='coerce')
-        
-        trend_data = trend_data.fillna(0)
+        _coerce_numeric(trend_data, ['order_count', 'total_sales', 'avg_order_value', 'unique_customers'])
         
         # Calculate trend scores and growth rates by region
         trends = []
         
         if 'region' in trend_data.columns:
-            # Group by region
-            for region_name, group in trend_data.groupby('region'):
-                # Calculate growth rate
-                if len(group) > 1:
-                    first_sales = group['total_sales'].iloc[0]
-                    last_sales = group['total_sales'].iloc[-1]
-                    growth_rate = ((last_sales - first_sales) / first_sales * 100) if first_sales > 0 else 0
-                else:
-                    growth_rate = 0
-                
-                # Calculate trend score (0-100 based on sales volume and growth)
-                avg_sales = group['total_sales'].mean()
-                max_sales = trend_data['total_sales'].max()
-                trend_score = (avg_sales / max_sales * 50) + (min(growth_rate, 100) / 2) if max_sales > 0 else 50
-                
-                trends.append({
+            max_sales = trend_data['total_sales'].max()
+            
+            # First, last and mean sales of every region in one groupby pass
+            sales = trend_data.groupby('region')['total_sales'].agg(['first', 'last', 'mean'])
+            first_sales = sales['first'].to_numpy(dtype=np.float64)
+            last_sales = sales['last'].to_numpy(dtype=np.float64)
+            
+            # Calculate growth rates
+            growth_rates = np.zeros_like(first_sales)
+            np.divide(last_sales - first_sales, first_sales, out=growth_rates, where=first_sales > 0)
+            growth_rates *= 100
+            
+            # Calculate trend scores (0-100 based on sales volume and growth)
+            if max_sales > 0:
+                avg_sales = sales['mean'].to_numpy(dtype=np.float64)
+                trend_scores = (avg_sales / max_sales * 50) + (np.minimum(growth_rates, 100) / 2)
+            else:
+                trend_scores = np.full(len(sales), 50.0)
+            
+            period = f'{days} days'
+            trends = [
+                {
                     'region': str(region_name),
                     'product_category': 'All',  # Aggregate across all categories
-                    'trend_score': float(trend_score),
-                    'growth_rate': float(growth_rate),
-                    'period': f'{days} days'
-                })
+                    'trend_score': trend_score,
+                    'growth_rate': growth_rate,
+                    'period': period
+                }
+                for region_name, trend_score, growth_rate in zip(
+                    sales.index.tolist(), trend_scores.tolist(), growth_rates.tolist()
+                )
+            ]
         else:
             # Single region or no region grouping
             if len(trend_data) > 1:
@@ -158,12 +184,12 @@ def handle_market_trends(params: Dict) -> Dict:
                 'period': f'{days} days'
             })
         
-        logger.info(f"Returning {len(trends)} trend records")
+        logger.info("Returning %d trend records", len(trends))
         
         return create_response(200, {'trends': trends})
     
     except Exception as e:
-        logger.error(f"Error analyzing market trends: {str(e)}", exc_info=True)
+        logger.error("Error analyzing market trends: %s", e, exc_info=True)
         return create_response(500, {'error': str(e)})
 
 
@@ -188,40 +214,46 @@ def handle_regional_prices(params: Dict) -> Dict:
         limit = int(params.get('limit', 1000))
         
         # Fetch regional pricing data
-        logger.info(f"Fetching regional prices (limit={limit})")
-        price_data = athena_client.get_regional_prices(limit=limit)
+        logger.info("Fetching regional prices (limit=%s)", limit)
+        price_data = _get('athena_client').get_regional_prices(limit=limit)
         
         if price_data.empty:
             logger.warning("No pricing data found, returning empty prices")
-            return create_response(200, {'prices': []})
+            return create_static_response('no_prices')
         
         # Convert numeric columns
-        numeric_cols = ['price', 'order_count', 'total_quantity']
-        for col in numeric_cols:
-            if col in price_data.columns:
-                price_data[col] = pd.to_numeric(price_data[col], errors='coerce')
-        
-        price_data = price_data.fillna(0)
-        
-        # Transform to expected format
-        prices = []
-        for _, row in price_data.iterrows():
-            prices.append({
-                'region': str(row.get('region', 'Unknown')),
-                'product_id': str(row.get('product_id', '')),
-                'product_name': str(row.get('product_name', 'Unknown Product')),
-                'avg_price': float(row.get('price', 0)),
-                'currency': str(row.get('currency', 'USD'))
-            })
+        _coerce_numeric(price_data, ['price', 'order_count', 'total_quantity'])
+        
+        # Transform to expected format, column by column
+        price_data = price_data.head(limit)
+        prices = pd.DataFrame({
+            'region': price_data.get('region', 'Unknown'),
+            'product_id': price_data.get('product_id', ''),
+            'product_name': price_data.get('product_name', 'Unknown Product'),
+            'avg_price': price_data.get('price', 0),
+            'currency': price_data.get('currency', 'USD')
+        }, index=price_data.index).fillna({
+            # Missing cells take the same defaults as missing columns, so
+            # nulls are not cast to 'nan', 'None' or '<NA>'. Missing prices
+            # were already set to 0 by _coerce_numeric above
+            'region': 'Unknown',
+            'product_id': '',
+            'product_name': 'Unknown Product',
+            'currency': 'USD'
+        }).astype({
+            'region': str,
+            'product_id': str,
+            'product_name': str,
+            'avg_price': float,
+            'currency': str
+        })
         
-        logger.info(f"Returning {len(prices)} price records")
+        logger.info("Returning %d price records", len(prices))
         
-        return create_response(200, {
-            'prices': prices[:limit]
-        })
+        return create_records_response(200, 'prices', prices)
     
     except Exception as e:
-        logger.error(f"Error fetching regional prices: {str(e)}", exc_info=True)
+        logger.error("Error fetching regional prices: %s", e, exc_info=True)
         return create_response(500, {'error': str(e)})
 
 
@@ -240,23 +272,18 @@ def handle_price_comparison(body: Dict) -> Dict:
         product_ids = body.get('product_ids')
         
         # Fetch pricing data
-        logger.info("Fetching pricing data for comparison...")
-        price_data = athena_client.get_regional_prices(product_ids=product_ids)
+        logger.debug("Fetching pricing data for comparison...")
+        price_data = _get('athena_client').get_regional_prices(product_ids=product_ids)
         
         if price_data.empty:
-            return create_response(404, {'error': 'No pricing data found'})
+            return create_static_response('pricing_not_found')
         
         # Convert numeric columns
-        numeric_cols = ['price', 'order_count', 'total_quantity']
-        for col in numeric_cols:
-            if col in price_data.columns:
-                price_data[col] = pd.to_numeric(price_data[col], errors='coerce')
-        
-        price_data = price_data.fillna(0)
+        _coerce_numeric(price_data, ['price', 'order_count', 'total_quantity'])
         
         # Perform comparison
-        logger.info("Comparing regional prices...")
-        comparison = regional_comparator.compare_regional_prices(
+        logger.debug("Comparing regional prices...")
+        comparison = _get('regional_comparator').compare_regional_prices(
             price_data,
             region_column='region',
             price_column='price',
@@ -267,7 +294,7 @@ def handle_price_comparison(body: Dict) -> Dict:
         return create_response(200, comparison)
     
     except Exception as e:
-        logger.error(f"Error comparing prices: {str(e)}")
+        logger.error("Error comparing prices: %s", e)
         return create_response(500, {'error': str(e)})
 
 
@@ -296,74 +323,81 @@ def handle_market_opportunities(body: Dict) -> Dict:
         weights = body.get('weights')
         top_n = body.get('top_n', 10)
         
-        # Fetch opportunity data
-        logger.info("Fetching market opportunity data...")
-        opp_data = athena_client.get_market_opportunity_data()
+        # Fetch opportunity data and growth rates concurrently
+        logger.debug("Fetching market opportunity data...")
+        athena_client = _get('athena_client')
+        opp_future = _query_executor.submit(athena_client.get_market_opportunity_data)
+        growth_future = _query_executor.submit(athena_client.get_regional_growth_rates)
+        opp_data = opp_future.result()
         
         if opp_data.empty:
             logger.warning("No opportunity data found, returning empty opportunities")
-            return create_response(200, {'opportunities': []})
+            return create_static_response('no_opportunities')
         
         # Convert numeric columns
-        numeric_cols = ['market_size', 'total_revenue', 'avg_order_value', 
-                       'unique_customers', 'product_variety', 'avg_price']
-        for col in numeric_cols:
-            if col in opp_data.columns:
-                opp_data[col] = pd.to_numeric(opp_data[col], errors='coerce')
-        
-        opp_data = opp_data.fillna(0)
+        _coerce_numeric(opp_data, ['market_size', 'total_revenue', 'avg_order_value',
+                                   'unique_customers', 'product_variety', 'avg_price'])
         
-        # Fetch growth rates
-        growth_data = athena_client.get_regional_growth_rates()
+        # Merge in growth rates
+        growth_data = growth_future.result()
         if not growth_data.empty:
-            growth_data['avg_growth_rate'] = pd.to_numeric(growth_data['avg_growth_rate'], errors='coerce')
-            opp_data = opp_data.merge(
-                growth_data[['region', 'avg_growth_rate']],
-                on='region',
-                how='left'
-            )
-            opp_data['growth_rate'] = opp_data['avg_growth_rate'].fillna(0)
+            # Look each region's growth rate up directly rather than merging
+            # and recopying every opp_data column
+            growth_map = dict(zip(
+                growth_data['region'].tolist(),
+                pd.to_numeric(growth_data['avg_growth_rate'], errors='coerce').tolist()
+            ))
+            opp_data['growth_rate'] = opp_data['region'].map(growth_map).fillna(0).to_numpy()
         else:
             opp_data['growth_rate'] = 0
         
         # Calculate opportunity scores
         # Score based on: market size, revenue, growth rate, customer base
-        max_revenue = opp_data['total_revenue'].max() if opp_data['total_revenue'].max() > 0 else 1
-        max_customers = opp_data['unique_customers'].max() if opp_data['unique_customers'].max() > 0 else 1
-        
-        opportunities = []
-        for _, row in opp_data.iterrows():
-            # Calculate score (0-100)
-            revenue_score = (row['total_revenue'] / max_revenue) * 40
-            customer_score = (row['unique_customers'] / max_customers) * 30
-            growth_score = min(abs(row['growth_rate']), 100) * 0.3
-            
-            opportunity_score = revenue_score + customer_score + growth_score
-            
-            # Generate recommendation
-            if opportunity_score >= 70:
-                recommendation = "High priority - Strong market potential"
-            elif opportunity_score >= 50:
-                recommendation = "Medium priority - Growing market"
-            else:
-                recommendation = "Low priority - Monitor for changes"
-            
-            opportunities.append({
-                'region': str(row['region']),
+        total_revenue = opp_data['total_revenue'].to_numpy(dtype=np.float64)
+        unique_customers = opp_data['unique_customers'].to_numpy(dtype=np.float64)
+        growth_rate = opp_data['growth_rate'].to_numpy(dtype=np.float64)
+        max_revenue = total_revenue.max()
+        max_revenue = max_revenue if max_revenue > 0 else 1
+        max_customers = unique_customers.max()
+        max_customers = max_customers if max_customers > 0 else 1
+        
+        # Score (0-100) for every region in one pass over the arrays
+        revenue_score = (total_revenue / max_revenue) * 40
+        customer_score = (unique_customers / max_customers) * 30
+        growth_score = np.minimum(np.abs(growth_rate), 100) * 0.3
+        scores = revenue_score + customer_score + growth_score
+        
+        # Keep the top_n scores, best first, without sorting the rest
+        top = top_n_positions(scores, top_n)
+        scores = scores[top]
+        
+        # Generate recommendations
+        recommendations = np.where(
+            scores >= 70, "High priority - Strong market potential",
+            np.where(scores >= 50, "Medium priority - Growing market",
+                     "Low priority - Monitor for changes")
+        )
+        
+        opportunities = [
+            {
+                # Missing regions are null for both dtype backends rather
+                # than str() of None / pd.NA
+                'region': None if pd.isna(region) else str(region),
                 'product_category': 'All',  # Aggregate view
-                'opportunity_score': float(opportunity_score),
+                'opportunity_score': score,
                 'recommendation': recommendation
-            })
-        
-        # Sort by score and limit
-        opportunities = sorted(opportunities, key=lambda x: x['opportunity_score'], reverse=True)[:top_n]
+            }
+            for region, score, recommendation in zip(
+                _column_values(opp_data['region'].iloc[top]), scores.tolist(), recommendations.tolist()
+            )
+        ]
         
-        logger.info(f"Returning {len(opportunities)} opportunity records")
+        logger.info("Returning %d opportunity records", len(opportunities))
         
         return create_response(200, {'opportunities': opportunities})
     
     except Exception as e:
-        logger.error(f"Error scoring opportunities: {str(e)}", exc_info=True)
+        logger.error("Error scoring opportunities: %s", e, exc_info=True)
         return create_response(500, {'error': str(e)})
 
 
@@ -382,47 +416,53 @@ def handle_competitor_analysis(body: Dict) -> Dict:
         region = body.get('region')
         analysis_type = body.get('analysis_type', 'pricing')
         
-        # Fetch competitor data
-        logger.info(f"Fetching competitor data for region={region}")
-        comp_data = athena_client.get_competitor_data(region=region)
+        if analysis_type not in ('pricing', 'market_share'):
+            return create_response(400, {'error': f'Invalid analysis_type: {analysis_type}'})
         
-        if comp_data.empty:
-            return create_response(404, {'error': 'No competitor data found'})
+        # Fetch per-region x competitor aggregates computed in Athena; the
+        # pricing analysis also needs per-competitor statistics, fetched
+        # alongside them
+        logger.info("Fetching competitor aggregates for region=%s", region)
+        athena_client = _get('athena_client')
+        if analysis_type == 'pricing':
+            stats_future = _query_executor.submit(athena_client.get_competitor_statistics, region=region)
+        share_data = athena_client.get_market_share(region=region)
         
-        # Convert numeric columns
-        numeric_cols = ['price', 'sales_quantity', 'sales_revenue']
-        for col in numeric_cols:
-            if col in comp_data.columns:
-                comp_data[col] = pd.to_numeric(comp_data[col], errors='coerce')
+        if share_data.empty:
+            return create_static_response('competitor_not_found')
         
-        comp_data = comp_data.fillna(0)
+        # Convert numeric columns
+        _coerce_numeric(share_data, ['sales', 'avg_price'], fill_value=None)
         
         if analysis_type == 'pricing':
             # Analyze competitor pricing
-            logger.info("Analyzing competitor pricing...")
-            analysis = competitor_analyzer.analyze_competitor_pricing(
-                comp_data,
+            logger.debug("Analyzing competitor pricing...")
+            stats_data = stats_future.result()
+            _coerce_numeric(stats_data, ['avg_price', 'median_price', 'min_price', 'max_price', 'price_std',
+                                         'regions_present', 'total_products', 'price_count'],
+                            fill_value=None)
+            
+            analysis = _get('competitor_analyzer').analyze_competitor_pricing_stats(
+                stats_data,
+                share_data,
                 competitor_column='competitor',
-                price_column='price',
                 region_column='region',
-                product_column='product_id'
+                price_column='avg_price'
             )
-        elif analysis_type == 'market_share':
+        else:
             # Analyze market share
-            logger.info("Analyzing market share...")
-            analysis = competitor_analyzer.analyze_market_share(
-                comp_data,
+            logger.debug("Analyzing market share...")
+            analysis = _get('competitor_analyzer').analyze_market_share_totals(
+                share_data,
                 competitor_column='competitor',
-                sales_column='sales_revenue',
+                sales_column='sales',
                 region_column='region'
             )
-        else:
-            return create_response(400, {'error': f'Invalid analysis_type: {analysis_type}'})
         
         return create_response(200, analysis)
     
     except Exception as e:
-        logger.error(f"Error analyzing competitors: {str(e)}")
+        logger.error("Error analyzing competitors: %s", e)
         return create_response(500, {'error': str(e)})
 
 
@@ -436,30 +476,30 @@ def handle_market_share(params: Dict) -> Dict:
         # Get parameters
         region = params.get('region')
         
-        # Fetch competitor data
-        logger.info(f"Fetching market share data for region={region}")
-        comp_data = athena_client.get_competitor_data(region=region)
+        # Fetch per-region x competitor sales totals computed in Athena
+        logger.info("Fetching market share data for region=%s", region)
+        share_data = _get('athena_client').get_market_share(region=region)
         
-        if comp_data.empty:
-            return create_response(404, {'error': 'No competitor data found'})
+        if share_data.empty:
+            return create_static_response('competitor_not_found')
         
-        # Convert numeric columns
-        comp_data['sales_revenue'] = pd.to_numeric(comp_data['sales_revenue'], errors='coerce')
-        comp_data = comp_data.fillna(0)
+        # Convert numeric columns; Athena already COALESCEs sales to 0, so
+        # a typed column needs neither parsing nor filling
+        _coerce_numeric(share_data, ['sales'], fill_value=None)
         
         # Analyze market share
-        logger.info("Analyzing market share...")
-        analysis = competitor_analyzer.analyze_market_share(
-            comp_data,
+        logger.debug("Analyzing market share...")
+        analysis = _get('competitor_analyzer').analyze_market_share_totals(
+            share_data,
             competitor_column='competitor',
-            sales_column='sales_revenue',
+            sales_column='sales',
             region_column='region'
         )
         
         return create_response(200, analysis)
     
     except Exception as e:
-        logger.error(f"Error analyzing market share: {str(e)}")
+        logger.error("Error analyzing market share: %s", e)
         return create_response(500, {'error': str(e)})
 
 
@@ -474,26 +514,22 @@ def handle_growth_rates(params: Dict) -> Dict:
         days = int(params.get('days', 180))
         
         # Fetch growth rates
-        logger.info(f"Fetching growth rates (days={days})")
-        growth_data = athena_client.get_regional_growth_rates(days=days)
+        logger.info("Fetching growth rates (days=%s)", days)
+        growth_data = _get('athena_client').get_regional_growth_rates(days=days)
         
         if growth_data.empty:
-            return create_response(404, {'error': 'No growth data found'})
+            return create_static_response('growth_not_found')
         
         # Convert numeric columns
-        numeric_cols = ['avg_growth_rate', 'total_revenue', 'months_count']
-        for col in numeric_cols:
-            if col in growth_data.columns:
-                growth_data[col] = pd.to_numeric(growth_data[col], errors='coerce')
+        _coerce_numeric(growth_data, ['avg_growth_rate', 'total_revenue', 'months_count'], fill_value=None)
         
-        return create_response(200, {
-            'growth_rates': growth_data.to_dict('records'),
+        return create_records_response(200, 'growth_rates', growth_data, {
             'count': len(growth_data),
             'period_days': days
         })
     
     except Exception as e:
-        logger.error(f"Error fetching growth rates: {str(e)}")
+        logger.error("Error fetching growth rates: %s", e)
         return create_response(500, {'error': str(e)})
 
 
@@ -515,19 +551,18 @@ def handle_trend_changes(body: Dict) -> Dict:
         window = body.get('window', 7)
         
         # Fetch trend data
-        logger.info(f"Fetching trend data for change detection...")
-        trend_data = athena_client.get_market_trends(region=region, days=days)
+        logger.info("Fetching trend data for change detection (region=%s, days=%s, window=%s)", region, days, window)
+        trend_data = _get('athena_client').get_market_trends(region=region, days=days)
         
         if trend_data.empty:
-            return create_response(404, {'error': 'No trend data found'})
+            return create_static_response('trend_not_found')
         
         # Convert numeric columns
-        trend_data['total_sales'] = pd.to_numeric(trend_data['total_sales'], errors='coerce')
-        trend_data = trend_data.fillna(0)
+        _coerce_numeric(trend_data, ['total_sales'])
         
         # Detect trend changes
-        logger.info("Detecting trend changes...")
-        changes = trend_analyzer.detect_trend_changes(
+        logger.debug("Detecting trend changes...")
+        changes = _get('trend_analyzer').detect_trend_changes(
             trend_data,
             date_column='date',
             value_column='total_sales',
@@ -543,19 +578,188 @@ def handle_trend_changes(body: Dict) -> Dict:
         })
     
     except Exception as e:
-        logger.error(f"Error detecting trend changes: {str(e)}")
+        logger.error("Error detecting trend changes: %s", e)
         return create_response(500, {'error': str(e)})
 
 
+def _json_default(obj: Any) -> Any:
+    """
+    Encode values orjson does not handle natively.
+    
+    pd.NA (missing values from Arrow-backed columns) encodes as null, as
+    None does for NumPy-backed data; everything else falls back to str().
+    """
+    if obj is pd.NA:
+        return None
+    return str(obj)
+
+
 def create_response(status_code: int, body: Dict) -> Dict:
     """Create API Gateway response."""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
-        },
-        'body': json.dumps(body, default=str)
+        'headers': dict(_HEADERS),
+        'body': orjson.dumps(body, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    }
+
+
+def _coerce_numeric(df: pd.DataFrame, columns: List[str], fill_value: Optional[float] = 0) -> None:
+    """
+    Convert the given columns of df to numbers in place.
+    
+    Columns that are missing are skipped, and columns Athena already returned
+    with a numeric type are not re-parsed. NaNs in the given columns are
+    replaced with fill_value unless it is None; other columns are left
+    untouched.
+    """
+    present = [col for col in columns if col in df.columns]
+    untyped = [col for col in present if not pd.api.types.is_numeric_dtype(df[col].dtype)]
+    if untyped:
+        df[untyped] = df[untyped].apply(pd.to_numeric, errors='coerce')
+    if fill_value is not None:
+        missing = [col for col in present if df[col].hasnans]
+        if missing:
+            df[missing] = df[missing].fillna(fill_value)
+
+
+def _column_values(series: pd.Series) -> List[Any]:
+    """
+    Return a column as a list of Python values.
+    
+    Arrow-backed and other extension columns are converted in one pass with
+    their missing values as None, which encodes as null rather than "<NA>".
+    """
+    if isinstance(series.dtype, np.dtype):
+        return series.tolist()
+    return series.to_numpy(dtype=object, na_value=None).tolist()
+
+
+def _df_to_json_records(df: pd.DataFrame) -> bytes:
+    """
+    Encode a DataFrame as a JSON array of records.
+    
+    Each column is unboxed once with tolist() and rows are zipped from the
+    column lists, which is several times cheaper than to_dict('records').
+    """
+    columns = [str(col) for col in df.columns]
+    rows = zip(*(_column_values(df[col]) for col in df.columns))
+    return orjson.dumps(
+        [dict(zip(columns, row)) for row in rows],
+        default=_json_default,
+        option=orjson.OPT_SERIALIZE_NUMPY
+    )
+
+
+def create_records_response(status_code: int, records_key: str, df: pd.DataFrame,
+                            extra: Dict = None) -> Dict:
+    """
+    Create API Gateway response whose body holds df's rows under records_key.
+    
+    The records and any extra top-level fields are encoded separately and
+    joined into the body with a single allocation and copy.
+    """
+    parts = [b'{', orjson.dumps(records_key), b':', _df_to_json_records(df)]
+    for key, value in (extra or {}).items():
+        parts += [b',', orjson.dumps(key), b':',
+                  orjson.dumps(value, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)]
+    parts.append(b'}')
+    
+    return {
+        'statusCode': status_code,
+        'headers': dict(_HEADERS),
+        'body': b''.join(parts).decode()
     }
+
+
+def _decode_body(event: Dict[str, Any]) -> Dict:
+    """
+    Parse the JSON request body.
+    
+    API Gateway base64-encodes bodies whose Content-Type matches a binary
+    media type, so those are decoded before parsing.
+    """
+    body = event.get('body')
+    if not body:
+        return {}
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    return orjson.loads(body)
+
+
+def _get_header(event: Dict[str, Any], header: str) -> str:
+    """Return a request header value, matching the name case-insensitively."""
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == header:
+            return value or ''
+    return ''
+
+
+def _accepts_gzip(event: Dict[str, Any]) -> bool:
+    """
+    Return True if a gzip-compressed response can be returned.
+    
+    The request must allow gzip in Accept-Encoding and name GZIP_MEDIA_TYPE
+    as its first Accept type; API Gateway only decodes the base64 body for
+    the client when Accept matches a binary media type.
+    """
+    if 'gzip' not in _get_header(event, 'accept-encoding').lower():
+        return False
+    accept = _get_header(event, 'accept').split(',')[0].split(';')[0]
+    return accept.strip().lower() == GZIP_MEDIA_TYPE
+
+
+def _compress_response(response: Dict) -> Dict:
+    """
+    Gzip a response body larger than GZIP_MIN_BYTES.
+    
+    The compressed body is base64-encoded as API Gateway expects for binary
+    payloads. Smaller responses are returned unchanged.
+    """
+    body = response['body'].encode()
+    if len(body) <= GZIP_MIN_BYTES:
+        return response
+    
+    return {
+        'statusCode': response['statusCode'],
+        'headers': dict(_GZIP_HEADERS),
+        'body': base64.b64encode(gzip.compress(body, compresslevel=1, mtime=0)).decode(),
+        'isBase64Encoded': True
+    }
+
+
+def create_static_response(key: str) -> Dict:
+    """Return a pre-encoded API Gateway response from _STATIC_RESPONSES."""
+    # Copy the response and its headers so callers that modify them (e.g.
+    # adding headers) cannot alter the shared template
+    response = _STATIC_RESPONSES[key]
+    return {**response, 'headers': dict(response['headers'])}
+
+
+# Responses whose bodies never change, encoded once at import
+_STATIC_RESPONSES = {
+    key: create_response(status_code, body)
+    for key, (status_code, body) in {
+        'endpoint_not_found': (404, {'error': 'Endpoint not found'}),
+        'no_trends': (200, {'trends': []}),
+        'no_prices': (200, {'prices': []}),
+        'no_opportunities': (200, {'opportunities': []}),
+        'pricing_not_found': (404, {'error': 'No pricing data found'}),
+        'competitor_not_found': (404, {'error': 'No competitor data found'}),
+        'growth_not_found': (404, {'error': 'No growth data found'}),
+        'trend_not_found': (404, {'error': 'No trend data found'}),
+    }.items()
+}
+
+
+# (method, path) -> (handler, whether it takes the JSON body rather than the
+# query string parameters)
+_ROUTES = {
+    ('GET', '/global-market/trends'): (handle_market_trends, False),
+    ('GET', '/global-market/regional-prices'): (handle_regional_prices, False),
+    ('POST', '/global-market/price-comparison'): (handle_price_comparison, True),
+    ('POST', '/global-market/opportunities'): (handle_market_opportunities, True),
+    ('POST', '/global-market/competitor-analysis'): (handle_competitor_analysis, True),
+    ('GET', '/global-market/market-share'): (handle_market_share, False),
+    ('GET', '/global-market/growth-rates'): (handle_growth_rates, False),
+    ('POST', '/global-market/trend-changes'): (handle_trend_changes, True),
+}
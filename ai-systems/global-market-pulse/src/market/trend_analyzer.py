@@ -16,6 +16,82 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.warning("Numba not available. Trend change detection will run in pure Python.")
+
+
+def _trend_change_scan(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Slide a window over values and score the change at each position.
+    
+    For each i in [window, len(values) - window) computes the NaN-skipping
+    means of the window before and after i and the z-score of their
+    difference against the sample std of the trailing window ending at i.
+    Positions without a usable std (too few points, a NaN in the window or
+    zero spread) keep NaN.
+    
+    Args:
+        values: Series values in time order
+        window: Window size
+    
+    Returns:
+        Tuple of (before means, after means, z-scores), each len(values) long
+    """
+    n = len(values)
+    before = np.full(n, np.nan)
+    after = np.full(n, np.nan)
+    z_scores = np.full(n, np.nan)
+    if window < 2:
+        return before, after, z_scores
+    
+    for i in range(window, n - window):
+        # Sample std of the trailing window values[i-window+1:i+1]
+        total = 0.0
+        complete = True
+        for j in range(i - window + 1, i + 1):
+            if np.isnan(values[j]):
+                complete = False
+                break
+            total += values[j]
+        if not complete:
+            continue
+        mean = total / window
+        sq_dev = 0.0
+        for j in range(i - window + 1, i + 1):
+            sq_dev += (values[j] - mean) ** 2
+        std = np.sqrt(sq_dev / (window - 1))
+        if not std > 0:
+            continue
+        
+        before_total = 0.0
+        before_count = 0
+        after_total = 0.0
+        after_count = 0
+        for j in range(i - window, i):
+            if not np.isnan(values[j]):
+                before_total += values[j]
+                before_count += 1
+        for j in range(i, i + window):
+            if not np.isnan(values[j]):
+                after_total += values[j]
+                after_count += 1
+        before_mean = before_total / before_count if before_count > 0 else np.nan
+        after_mean = after_total / after_count if after_count > 0 else np.nan
+        
+        before[i] = before_mean
+        after[i] = after_mean
+        z_scores[i] = abs(after_mean - before_mean) / std
+    
+    return before, after, z_scores
+
+
+if NUMBA_AVAILABLE:
+    _trend_change_scan = njit(_trend_change_scan)
+
 
 class TrendAnalyzer:
     """
@@ -51,8 +127,8 @@ class TrendAnalyzer:
             if region_column:
                 # Analyze by region
                 results = {}
-                for region in data[region_column].unique():
-                    region_data = data[data[region_column] == region]
+                for region, idx in data.groupby(region_column, sort=False, dropna=False).indices.items():
+                    region_data = data.take(idx)
                     results[region] = self._analyze_single_series(
                         region_data, date_column, value_column
                     )
@@ -302,31 +378,30 @@ class TrendAnalyzer:
             data[date_column] = pd.to_datetime(data[date_column])
             data = data.sort_values(date_column)
             
-            # Calculate rolling trends
-            data['rolling_mean'] = data[value_column].rolling(window=window).mean()
-            data['rolling_std'] = data[value_column].rolling(window=window).std()
+            if not isinstance(window, (int, np.integer)) or window < 0:
+                raise ValueError("window must be an integer 0 or greater")
+            
+            # Score every position in one compiled pass over the values
+            values = data[value_column].to_numpy(dtype=np.float64)
+            before, after, z_scores = _trend_change_scan(values, int(window))
             
             # Detect changes
             changes = []
-            for i in range(window, len(data) - window):
-                before = data.iloc[i-window:i][value_column].mean()
-                after = data.iloc[i:i+window][value_column].mean()
-                std = data.iloc[i]['rolling_std']
-                
-                if pd.notna(std) and std > 0:
-                    # Z-score for change
-                    z_score = abs(after - before) / std
-                    
-                    if z_score > 2:  # Significant change
-                        changes.append({
-                            'date': data.iloc[i][date_column].isoformat(),
-                            'index': i,
-                            'before_mean': float(before),
-                            'after_mean': float(after),
-                            'change_pct': float((after - before) / before * 100) if before != 0 else 0,
-                            'z_score': float(z_score),
-                            'significance': 'high' if z_score > 3 else 'medium'
-                        })
+            significant = np.flatnonzero(z_scores > 2)  # Significant change
+            dates = data[date_column].iloc[significant]
+            for i, date in zip(significant.tolist(), dates):
+                before_mean = float(before[i])
+                after_mean = float(after[i])
+                z_score = float(z_scores[i])
+                changes.append({
+                    'date': date.isoformat(),
+                    'index': i,
+                    'before_mean': before_mean,
+                    'after_mean': after_mean,
+                    'change_pct': float((after_mean - before_mean) / before_mean * 100) if before_mean != 0 else 0,
+                    'z_score': z_score,
+                    'significance': 'high' if z_score > 3 else 'medium'
+                })
             
             return changes
         
@@ -12,6 +12,21 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def top_n_positions(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Return the positions of the n highest scores, highest first.
+    
+    np.argpartition selects the n best in linear time so only they are
+    sorted. NaN scores rank last and equal scores keep their original order.
+    """
+    n = min(max(n, 0), len(scores))
+    if 0 < n < len(scores):
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
 class OpportunityScorer:
     """
     Scores market opportunities using MCDA methodology.
@@ -27,6 +42,12 @@ class OpportunityScorer:
             'price_premium': 0.15,
             'market_maturity': 0.15
         }
+        
+        # The default weights as a read-only vector in criteria order, built
+        # once so default scoring calls skip rebuilding it
+        self._default_criteria = tuple(self.default_weights)
+        self._default_weight_vector = np.array(list(self.default_weights.values()), dtype=np.float64)
+        self._default_weight_vector.setflags(write=False)
     
     def score_opportunities(self, data: pd.DataFrame,
                            region_column: str = 'region',
@@ -132,15 +153,23 @@ class OpportunityScorer:
     def _calculate_weighted_scores(self, data: pd.DataFrame,
                                    weights: Dict[str, float]) -> pd.Series:
         """Calculate weighted opportunity scores."""
-        score = pd.Series(0.0, index=data.index)
+        if weights is self.default_weights:
+            criteria, weight_vector = self._default_criteria, self._default_weight_vector
+        else:
+            criteria = tuple(weights)
+            weight_vector = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+        
+        # Criteria without a normalized column do not contribute
+        present = np.array([f'{criterion}_normalized' in data.columns for criterion in criteria], dtype=bool)
+        if not present.all():
+            criteria = [criterion for criterion, keep in zip(criteria, present) if keep]
+            weight_vector = weight_vector[present]
         
-        for criterion, weight in weights.items():
-            column = f'{criterion}_normalized'
-            if column in data.columns:
-                score += data[column] * weight
+        # One matrix-vector product over the normalized criteria columns
+        normalized = data[[f'{criterion}_normalized' for criterion in criteria]].to_numpy(dtype=np.float64)
         
         # Scale to 0-100
-        return score * 100
+        return pd.Series(normalized @ weight_vector * 100, index=data.index)
     
     def _categorize_score(self, score: float) -> str:
         """Categorize opportunity score."""
@@ -170,28 +199,32 @@ class OpportunityScorer:
             List of top opportunities with details
         """
         try:
-            # Sort by score
-            sorted_data = scored_data.sort_values('opportunity_score', ascending=False)
+            # Get top N without sorting the rest
+            scores = scored_data['opportunity_score'].to_numpy(dtype=np.float64)
+            top_opportunities = scored_data.iloc[top_n_positions(scores, top_n)]
             
-            # Get top N
-            top_opportunities = sorted_data.head(top_n)
+            # Add criteria values if available
+            criteria_fields = [field for field in ['market_size', 'growth_rate', 'competition_level', 
+                                                   'price_premium', 'market_maturity']
+                               if field in top_opportunities.columns]
+            criteria_values = [top_opportunities[field].tolist() for field in criteria_fields]
             
             # Convert to list of dictionaries
             opportunities = []
-            for _, row in top_opportunities.iterrows():
+            for i, (region, score, rank, category) in enumerate(zip(
+                top_opportunities[region_column].tolist(),
+                top_opportunities['opportunity_score'].tolist(),
+                top_opportunities['opportunity_rank'].tolist(),
+                top_opportunities['opportunity_category'].tolist()
+            )):
                 opp = {
-                    'region': row[region_column],
-                    'opportunity_score': float(row['opportunity_score']),
-                    'rank': int(row['opportunity_rank']),
-                    'category': row['opportunity_category']
+                    'region': region,
+                    'opportunity_score': float(score),
+                    'rank': int(rank),
+                    'category': category
                 }
-                
-                # Add criteria values if available
-                criteria_fields = ['market_size', 'growth_rate', 'competition_level', 
-                                 'price_premium', 'market_maturity']
-                for field in criteria_fields:
-                    if field in row:
-                        opp[field] = float(row[field])
+                for field, values in zip(criteria_fields, criteria_values):
+                    opp[field] = float(values[i])
                 
                 opportunities.append(opp)
             
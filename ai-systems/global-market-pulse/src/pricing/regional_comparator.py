@@ -107,42 +107,45 @@ class RegionalComparator:
                                   price_column: str,
                                   product_column: str) -> List[Dict[str, Any]]:
         """Calculate statistics for each region."""
-        stats_list = []
+        # NaN-skipping reductions per region; regions without any price have
+        # a zero count and are dropped afterwards
+        stats_frame = data.groupby(region_column, sort=False)[price_column].agg(
+            mean_price='mean',
+            median_price='median',
+            std_dev='std',
+            min_price='min',
+            max_price='max',
+            count='count'
+        )
+        stats_frame = stats_frame[stats_frame['count'] > 0]
         
-        for region in data[region_column].unique():
-            region_data = data[data[region_column] == region][price_column].dropna()
-            
-            if len(region_data) == 0:
-                continue
-            
-            stats_list.append({
-                'region': region,
-                'mean_price': float(region_data.mean()),
-                'median_price': float(region_data.median()),
-                'std_dev': float(region_data.std()),
-                'min_price': float(region_data.min()),
-                'max_price': float(region_data.max()),
-                'count': int(len(region_data)),
-                'coefficient_of_variation': float(region_data.std() / region_data.mean()) if region_data.mean() > 0 else 0
-            })
+        mean_price = stats_frame['mean_price'].to_numpy(dtype=np.float64)
+        std_dev = stats_frame['std_dev'].to_numpy(dtype=np.float64)
+        cv = np.zeros_like(mean_price)
+        np.divide(std_dev, mean_price, out=cv, where=mean_price > 0)
+        stats_frame = stats_frame.assign(coefficient_of_variation=cv)
         
         # Sort by mean price
-        stats_list.sort(key=lambda x: x['mean_price'], reverse=True)
+        stats_frame = stats_frame.sort_values('mean_price', ascending=False, kind='stable')
+        stats_frame.index.name = 'region'
         
-        return stats_list
+        return stats_frame.reset_index().to_dict(orient='records')
     
     def _pairwise_comparisons(self, data: pd.DataFrame,
                              region_column: str,
                              price_column: str) -> List[Dict[str, Any]]:
         """Perform pairwise statistical comparisons between regions."""
-        regions = data[region_column].unique()
+        # Slice each region's prices, and reduce them, once rather than
+        # per pair
+        prices = data[price_column]
+        region_prices = []
+        for region, idx in data.groupby(region_column, sort=False).indices.items():
+            region_data = prices.take(idx).dropna()
+            region_prices.append((region, region_data, region_data.mean(), region_data.std()))
         comparisons = []
         
-        for i, region1 in enumerate(regions):
-            for region2 in regions[i+1:]:
-                prices1 = data[data[region_column] == region1][price_column].dropna()
-                prices2 = data[data[region_column] == region2][price_column].dropna()
-                
+        for i, (region1, prices1, mean1, std1) in enumerate(region_prices):
+            for region2, prices2, mean2, std2 in region_prices[i+1:]:
                 if len(prices1) < 2 or len(prices2) < 2:
                     continue
                 
@@ -150,21 +153,21 @@ class RegionalComparator:
                 t_stat, p_value = stats.ttest_ind(prices1, prices2)
                 
                 # Calculate effect size (Cohen's d)
-                pooled_std = np.sqrt((prices1.std()**2 + prices2.std()**2) / 2)
-                cohens_d = (prices1.mean() - prices2.mean()) / pooled_std if pooled_std > 0 else 0
+                pooled_std = np.sqrt((std1**2 + std2**2) / 2)
+                cohens_d = (mean1 - mean2) / pooled_std if pooled_std > 0 else 0
                 
                 # Determine significance
                 is_significant = p_value < 0.05
                 
                 # Calculate price difference
-                price_diff = prices1.mean() - prices2.mean()
-                price_diff_pct = (price_diff / prices2.mean() * 100) if prices2.mean() > 0 else 0
+                price_diff = mean1 - mean2
+                price_diff_pct = (price_diff / mean2 * 100) if mean2 > 0 else 0
                 
                 comparisons.append({
                     'region1': region1,
                     'region2': region2,
-                    'region1_mean': float(prices1.mean()),
-                    'region2_mean': float(prices2.mean()),
+                    'region1_mean': float(mean1),
+                    'region2_mean': float(mean2),
                     'price_difference': float(price_diff),
                     'price_difference_pct': float(price_diff_pct),
                     't_statistic': float(t_stat),
@@ -198,17 +201,18 @@ class RegionalComparator:
         """Identify price outliers within each region."""
         outliers = []
         
-        for region in data[region_column].unique():
-            region_data = data[data[region_column] == region].copy()
+        for region, idx in data.groupby(region_column, sort=False).indices.items():
+            region_data = data.take(idx)
             prices = region_data[price_column].dropna()
             
             if len(prices) < 4:
                 continue
             
             # Calculate IQR
-            Q1 = prices.quantile(0.25)
-            Q3 = prices.quantile(0.75)
+            Q1, Q3 = prices.quantile([0.25, 0.75])
             IQR = Q3 - Q1
+            mean_price = prices.mean()
+            std_price = prices.std()
             
             # Define outlier bounds
             lower_bound = Q1 - 1.5 * IQR
@@ -225,9 +229,9 @@ class RegionalComparator:
                     'region': region,
                     'product_id': row[product_column] if product_column in row else 'unknown',
                     'price': float(row[price_column]),
-                    'mean_price': float(prices.mean()),
-                    'deviation_from_mean': float(row[price_column] - prices.mean()),
-                    'z_score': float((row[price_column] - prices.mean()) / prices.std()) if prices.std() > 0 else 0,
+                    'mean_price': float(mean_price),
+                    'deviation_from_mean': float(row[price_column] - mean_price),
+                    'z_score': float((row[price_column] - mean_price) / std_price) if std_price > 0 else 0,
                     'outlier_type': 'high' if row[price_column] > upper_bound else 'low'
                 })
         
@@ -243,21 +247,25 @@ class RegionalComparator:
             return {}
         
         # Calculate dispersion metrics
-        price_range = all_prices.max() - all_prices.min()
-        cv = all_prices.std() / all_prices.mean() if all_prices.mean() > 0 else 0
+        overall_mean = all_prices.mean()
+        overall_std = all_prices.std()
+        min_price = all_prices.min()
+        max_price = all_prices.max()
+        price_range = max_price - min_price
+        cv = overall_std / overall_mean if overall_mean > 0 else 0
         
         # Calculate Gini coefficient
         gini = self._calculate_gini(all_prices.values)
         
         return {
-            'overall_mean': float(all_prices.mean()),
-            'overall_std': float(all_prices.std()),
+            'overall_mean': float(overall_mean),
+            'overall_std': float(overall_std),
             'price_range': float(price_range),
             'coefficient_of_variation': float(cv),
             'gini_coefficient': float(gini),
-            'min_price': float(all_prices.min()),
-            'max_price': float(all_prices.max()),
-            'price_spread_pct': float(price_range / all_prices.mean() * 100) if all_prices.mean() > 0 else 0
+            'min_price': float(min_price),
+            'max_price': float(max_price),
+            'price_spread_pct': float(price_range / overall_mean * 100) if overall_mean > 0 else 0
         }
     
     def _calculate_gini(self, values: np.ndarray) -> float:
@@ -292,8 +300,8 @@ class RegionalComparator:
             
             # Group by currency
             currency_stats = []
-            for currency in data[currency_column].unique():
-                currency_data = data[data[currency_column] == currency]
+            for currency, idx in data.groupby(currency_column, sort=False).indices.items():
+                currency_data = data.take(idx)
                 prices = currency_data[price_column].dropna()
                 
                 if len(prices) == 0:
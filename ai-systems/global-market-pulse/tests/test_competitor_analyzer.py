@@ -0,0 +1,44 @@
+"""
+Unit Tests for the competitor analyzer
+Covers the ordering of tied market shares
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from competitor.competitor_analyzer import CompetitorAnalyzer  # noqa: E402
+
+
+def make_tied_sales() -> pd.DataFrame:
+    """Two competitors with equal sales overall and in every region"""
+    return pd.DataFrame({
+        'region': ['North America', 'North America', 'Europe', 'Europe'],
+        'competitor': ['B', 'A', 'A', 'B'],
+        'sales': [10.0, 10.0, 5.0, 5.0]
+    })
+
+
+class TestMarketShareTies:
+    """Tied shares keep a deterministic order"""
+
+    def test_overall_ties_ordered_by_name(self):
+        analysis = CompetitorAnalyzer().analyze_market_share(make_tied_sales())
+
+        assert [c['competitor'] for c in analysis['overall_market_share']] == ['A', 'B']
+
+    def test_regional_ties_ordered_by_first_appearance(self):
+        analysis = CompetitorAnalyzer().analyze_market_share(make_tied_sales())
+
+        leaders = {r['region']: r['market_leader'] for r in analysis['regional_market_share']}
+        assert leaders == {'North America': 'B', 'Europe': 'A'}
+
+    def test_totals_match_row_level_analysis(self):
+        sales = make_tied_sales()
+        totals = sales.sort_values(['region', 'competitor']).reset_index(drop=True)
+
+        analyzer = CompetitorAnalyzer()
+        assert analyzer.analyze_market_share_totals(totals) == analyzer.analyze_market_share(totals)
@@ -0,0 +1,202 @@
+"""
+Unit Tests for the Global Market Pulse Lambda handler
+Runs the handler against an in-memory Athena client, no AWS access required
+"""
+
+import base64
+import gzip
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import handler  # noqa: E402
+
+
+class FakeAthenaClient:
+    """Serves fixed query results in place of Athena"""
+
+    def __init__(self, n_products: int = 100, dtype_backend: str = 'numpy'):
+        self.dtype_backend = dtype_backend
+        self.prices = pd.DataFrame({
+            'product_id': [str(i) for i in range(n_products)],
+            'product_name': [f'Product {i}' for i in range(n_products)],
+            'category_id': ['electronics'] * n_products,
+            'price': [10.0 + i for i in range(n_products)],
+            'currency': ['USD'] * n_products,
+            'region': [('North America', 'Europe')[i % 2] for i in range(n_products)],
+            'order_count': [5] * n_products,
+            'total_quantity': [20] * n_products
+        })
+        # One product without a region and one without a price, as NULLs
+        # come back from Athena
+        self.prices['region'] = self.prices['region'].astype(object)
+        self.prices.loc[0, 'region'] = None
+        self.prices.loc[3, 'price'] = None
+
+    def get_regional_prices(self, product_ids=None, limit=1000):
+        prices = self.prices
+        if product_ids:
+            prices = prices[prices['product_id'].isin([str(pid) for pid in product_ids])]
+        return self._result(prices.head(limit).reset_index(drop=True))
+
+    def get_market_opportunity_data(self, limit=100):
+        return self._result(pd.DataFrame({
+            'region': ['North America', None, 'Europe'],
+            'market_size': [50.5, 30.5, 20.5],
+            'total_revenue': [5000.5, 3000.5, 2500.5],
+            'avg_order_value': [100.5, 90.5, 80.5],
+            'unique_customers': [40.5, 25.5, 15.5],
+            'product_variety': [20.5, 15.5, 10.5],
+            'avg_price': [30.5, 25.5, 20.5]
+        }))
+
+    def get_regional_growth_rates(self, days=180):
+        return self._result(pd.DataFrame({
+            'region': ['North America', 'Europe'],
+            'avg_growth_rate': [12.5, -2.5],
+            'total_revenue': [10.5, 30.5],
+            'months_count': [3.5, 5.5]
+        }))
+
+    def get_market_share(self, region=None):
+        return self._result(pd.DataFrame({
+            'region': ['North America', 'North America', None, 'Europe'],
+            'competitor': ['A', 'B', 'A', 'B'],
+            'sales': [1000.5, 500.5, 250.5, 750.5],
+            'avg_price': [20.5, 25.5, 22.5, 24.5]
+        }))
+
+    def _result(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return df with the column dtypes the configured backend produces"""
+        if self.dtype_backend == 'pyarrow':
+            return df.convert_dtypes(dtype_backend='pyarrow')
+        return df
+
+
+@pytest.fixture
+def athena_client(monkeypatch):
+    """Install the fake Athena client in the handler's component cache"""
+    client = FakeAthenaClient()
+    monkeypatch.setitem(handler._components, 'athena_client', client)
+    return client
+
+
+def make_event(method: str, path: str, body=None, params=None, headers=None) -> dict:
+    """Build an API Gateway proxy event"""
+    return {
+        'httpMethod': method,
+        'path': path,
+        'queryStringParameters': params,
+        'headers': headers or {},
+        'body': json.dumps(body) if body is not None else None,
+        'isBase64Encoded': False
+    }
+
+
+class TestRequestBody:
+    """Request body decoding"""
+
+    def test_plain_json_body(self, athena_client):
+        event = make_event('POST', '/global-market/price-comparison',
+                           body={'product_ids': ['1', '2']})
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        statistics = json.loads(response['body'])['regional_statistics']
+        # Only the two requested products were compared
+        assert sum(region['count'] for region in statistics) == 2
+
+    def test_base64_encoded_body(self, athena_client):
+        event = make_event('POST', '/global-market/price-comparison',
+                           body={'product_ids': ['1', '2']})
+        event['body'] = base64.b64encode(event['body'].encode()).decode()
+        event['isBase64Encoded'] = True
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        statistics = json.loads(response['body'])['regional_statistics']
+        # Only the two requested products were compared
+        assert sum(region['count'] for region in statistics) == 2
+
+
+class TestResponseCompression:
+    """Gzip responses are only returned to clients that opt in"""
+
+    def test_gzip_with_binary_accept_type(self, athena_client):
+        event = make_event('GET', '/global-market/regional-prices', params={'limit': '100'},
+                           headers={'Accept-Encoding': 'gzip, deflate',
+                                    'Accept': handler.GZIP_MEDIA_TYPE})
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['isBase64Encoded'] is True
+        assert response['headers']['Content-Encoding'] == 'gzip'
+        body = json.loads(gzip.decompress(base64.b64decode(response['body'])))
+        assert len(body['prices']) == 100
+
+    def test_plain_json_without_binary_accept_type(self, athena_client):
+        event = make_event('GET', '/global-market/regional-prices', params={'limit': '100'},
+                           headers={'Accept-Encoding': 'gzip, deflate',
+                                    'Accept': 'application/json'})
+
+        response = handler.lambda_handler(event, None)
+
+        assert not response.get('isBase64Encoded')
+        assert 'Content-Encoding' not in response['headers']
+        assert len(json.loads(response['body'])['prices']) == 100
+
+
+@pytest.mark.parametrize('dtype_backend', ['numpy', 'pyarrow'])
+class TestDtypeBackends:
+    """Missing values encode the same way for NumPy and Arrow-backed results"""
+
+    @pytest.fixture(autouse=True)
+    def backend_client(self, monkeypatch, dtype_backend):
+        monkeypatch.setitem(handler._components, 'athena_client',
+                            FakeAthenaClient(dtype_backend=dtype_backend))
+
+    def test_opportunities_null_region(self, dtype_backend):
+        event = make_event('POST', '/global-market/opportunities', body={'top_n': 3})
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        opportunities = json.loads(response['body'])['opportunities']
+        assert {o['region'] for o in opportunities} == {'North America', 'Europe', None}
+
+    def test_market_share_null_region(self, dtype_backend):
+        event = make_event('GET', '/global-market/market-share')
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        regions = [r['region'] for r in json.loads(response['body'])['regional_market_share']]
+        assert '<NA>' not in regions and 'None' not in regions
+
+    def test_regional_prices_null_region(self, dtype_backend):
+        event = make_event('GET', '/global-market/regional-prices', params={'limit': '10'})
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        prices = json.loads(response['body'])['prices']
+        assert prices[0]['product_id'] == '0'
+        assert prices[0]['region'] == 'Unknown'
+
+    def test_regional_prices_null_price(self, dtype_backend):
+        event = make_event('GET', '/global-market/regional-prices', params={'limit': '10'})
+
+        response = handler.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        prices = json.loads(response['body'])['prices']
+        assert prices[3]['product_id'] == '3'
+        assert prices[3]['avg_price'] == 0.0
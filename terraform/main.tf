@@ -139,6 +139,10 @@ module "api_gateway" {
   global_market_pulse_lambda_function_name = module.global_market_pulse_lambda.function_name
   global_market_pulse_lambda_invoke_arn    = module.global_market_pulse_lambda.invoke_arn
   
+  # Global Market Pulse returns gzip-compressed bodies to clients that send
+  # its GZIP_MEDIA_TYPE in Accept
+  binary_media_types = module.global_market_pulse_lambda.binary_media_types
+  
   kms_key_arn         = module.kms.kms_key_arn
   cors_allowed_origin = "*"  # Allow all origins for dev environment (localhost + S3)
   enable_waf          = false  # Disable WAF for dev environment
@@ -614,6 +618,7 @@ module "global_market_pulse_lambda" {
   additional_env_vars = {
     MPLCONFIGDIR = "/tmp/matplotlib"
     PLOTLY_RENDERER = "json"
+    GZIP_MEDIA_TYPE = "application/gzip"
   }
   
   tags = {
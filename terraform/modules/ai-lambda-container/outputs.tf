@@ -17,3 +17,8 @@ output "qualified_arn" {
   description = "Qualified ARN of the Lambda function"
   value       = aws_lambda_function.ai_lambda.qualified_arn
 }
+
+output "binary_media_types" {
+  description = "Binary media types API Gateway must list for the function's gzip responses (from GZIP_MEDIA_TYPE)"
+  value       = compact([lookup(var.additional_env_vars, "GZIP_MEDIA_TYPE", "")])
+}
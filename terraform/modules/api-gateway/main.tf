@@ -6,6 +6,10 @@ resource "aws_api_gateway_rest_api" "main" {
   name        = var.api_name
   description = "eCommerce AI Analytics Platform API"
 
+  # Only explicitly binary types; JSON request bodies must reach the Lambda
+  # handlers as text
+  binary_media_types = var.binary_media_types
+
   endpoint_configuration {
     types = ["REGIONAL"]
   }
@@ -434,6 +438,7 @@ resource "aws_api_gateway_deployment" "main" {
       aws_api_gateway_integration.analytics_query_lambda.id,
       aws_api_gateway_integration.analytics_forecast_lambda.id,
       aws_api_gateway_integration.analytics_insights_lambda.id,
+      aws_api_gateway_rest_api.main.binary_media_types,
     ]))
   }
 
@@ -6,6 +6,12 @@ variable "api_name" {
   default     = "ecommerce-platform-api"
 }
 
+variable "binary_media_types" {
+  description = "Media types API Gateway treats as binary (e.g. gzip-compressed Lambda responses)"
+  type        = list(string)
+  default     = []
+}
+
 variable "stage_name" {
   description = "API Gateway stage name"
   type        = string
@@ -16,6 +16,8 @@ resource "aws_lambda_function" "global_market_pulse" {
     variables = {
       ATHENA_DATABASE        = var.athena_database
       ATHENA_OUTPUT_LOCATION = var.athena_output_location
+      ATHENA_DTYPE_BACKEND   = "pyarrow"
+      GZIP_MEDIA_TYPE        = var.gzip_media_type
       AWS_REGION            = var.aws_region
       LOG_LEVEL             = var.log_level
     }
@@ -29,3 +29,8 @@ output "log_group_name" {
   description = "Name of the CloudWatch log group"
   value       = aws_cloudwatch_log_group.lambda_logs.name
 }
+
+output "binary_media_types" {
+  description = "Binary media types the API Gateway REST API must list for compressed responses"
+  value       = [var.gzip_media_type]
+}
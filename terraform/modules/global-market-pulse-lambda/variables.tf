@@ -56,6 +56,12 @@ variable "log_level" {
   default     = "INFO"
 }
 
+variable "gzip_media_type" {
+  description = "Binary media type clients send in Accept to receive gzip-compressed responses"
+  type        = string
+  default     = "application/gzip"
+}
+
 variable "log_retention_days" {
   description = "CloudWatch log retention in days"
   type        = number